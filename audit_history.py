@@ -0,0 +1,110 @@
+import os
+import subprocess
+from collections import Counter
+
+from diffcheck import clean_lines, compare_lines, read_clean_lines
+
+class GitBlobReader:
+    """Reads blobs from a repository through one long-lived `git cat-file --batch` process."""
+
+    def __init__(self, repo):
+        self._process = subprocess.Popen(['git', '-C', repo, 'cat-file', '--batch'],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, blob_id):
+        """Return the contents of a blob as bytes."""
+        self._process.stdin.write(f"{blob_id}\n".encode())
+        self._process.stdin.flush()
+
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"blob {blob_id} not found")
+        data = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # Trailing newline
+        return data
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_path_blobs(repo, paths, rev='--all'):
+    """
+    Yield (commit, commit_time, path, blob_id) for every commit in rev that
+    changed one of paths (git pathspecs), newest first. Nothing is checked out.
+    """
+    cmd = ['git', '-C', repo, 'log', rev, '--no-renames', '--raw', '--no-abbrev',
+           '--diff-merges=first-parent', '--format=commit %H %ct', '--'] + list(paths)
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as process:
+        commit = commit_time = None
+        for line in process.stdout:
+            if line.startswith('commit '):
+                _, commit, commit_time = line.split()
+                commit_time = int(commit_time)
+            elif line.startswith(':'):
+                # :<old mode> <new mode> <old blob> <new blob> <status>\t<path>
+                info, path = line.rstrip('\n').split('\t', 1)
+                _, _, _, blob_id, status = info.split()
+                if status != 'D':
+                    yield commit, commit_time, path, blob_id
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+def rank_commits(deployed_file_path, repo, paths=None, rev='--all', top=10):
+    """
+    Rank the versions of paths in a repository's history by how many of the
+    deployed file's normalized lines they match.
+
+    Identical blobs are compared once. A multiset intersection of lines is an
+    upper bound on the exact matching lines, so blobs are diffed exactly in
+    order of that bound, stopping once no remaining blob can enter the top
+    results. Returns up to `top` dicts, best first.
+    """
+    deployed_lines = read_clean_lines(deployed_file_path)
+    deployed_counts = Counter(deployed_lines)
+    total_lines = len(deployed_lines)
+
+    # By default, look at every file in the history with the deployed file's name
+    if not paths:
+        paths = [f":(glob)**/{os.path.basename(deployed_file_path)}"]
+
+    commits_by_blob = {}
+    for commit, commit_time, path, blob_id in iter_path_blobs(repo, paths, rev):
+        commits_by_blob.setdefault(blob_id, []).append((commit_time, commit, path))
+
+    results = []
+    with GitBlobReader(repo) as reader:
+        bounds = []
+        for blob_id in commits_by_blob:
+            blob_counts = Counter(clean_lines(reader.read(blob_id)))
+            bounds.append((sum((deployed_counts & blob_counts).values()), blob_id))
+        bounds.sort(reverse=True)
+
+        for bound, blob_id in bounds:
+            # A blob that can only tie may still win on the size of its diff
+            if len(results) >= top and bound < results[top - 1]["matching_lines"]:
+                break
+
+            comparison = compare_lines(deployed_lines, clean_lines(reader.read(blob_id)))
+            # The oldest commit that produced this exact version
+            commit_time, commit, path = min(commits_by_blob[blob_id])
+            results.append({
+                "commit": commit,
+                "commit_time": commit_time,
+                "path": path,
+                "blob": blob_id,
+                "commits": len(commits_by_blob[blob_id]),
+                "matching_lines": comparison["matching_lines"],
+                "total_lines": total_lines,
+                "match_percentage": comparison["matching_lines"] / total_lines * 100 if total_lines else 0,
+                "additions": comparison["additions"],
+                "deletions": comparison["deletions"],
+            })
+            results.sort(key=lambda result: (-result["matching_lines"], result["additions"] + result["deletions"]))
+
+    return results[:top]
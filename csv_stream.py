@@ -0,0 +1,84 @@
+import csv
+import os
+import argparse
+import tempfile
+
+def iter_file_list(csv_file):
+    """Yield filenames from the first column of a CSV file, one row at a time."""
+    with open(csv_file, 'r', newline='') as f:
+        reader = csv.reader(f)
+        # Skip header
+        next(reader, None)
+        for row in reader:
+            if row and row[0]:  # Ensure row is not empty
+                yield row[0]
+
+def count_written_rows(output_file):
+    """
+    Count the complete data rows already written to an output CSV.
+    A partially written last line (e.g. from a crash) is truncated so that
+    appending can continue from the last complete row.
+    """
+    if not os.path.exists(output_file):
+        return 0
+
+    lines = 0
+    good_end = 0
+    with open(output_file, 'rb+') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            lines += 1
+            good_end += len(line)
+        f.truncate(good_end)
+
+    # The first line is the header
+    return max(lines - 1, 0)
+
+def parse_flush_every(value):
+    """Parse a --flush-every row count, which must be at least 1, for argparse."""
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid row count '{value}'")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"invalid row count '{value}', need at least 1")
+    return count
+
+def write_csv_rows(rows, output_file, header, flush_every=100, resume=False):
+    """
+    Write rows to a CSV file as they are produced.
+    The file is flushed every `flush_every` rows so a crash loses at most that
+    many rows. With `resume`, rows are appended to an existing file instead of
+    overwriting it. Returns the number of rows written.
+    """
+    append = resume and os.path.exists(output_file) and os.path.getsize(output_file) > 0
+    written = 0
+    with open(output_file, 'a' if append else 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        if not append:
+            writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+            if written % flush_every == 0:
+                csvfile.flush()
+    return written
+
+def replace_csv(output_file, header, rows):
+    """
+    Write a CSV file atomically: rows go to a temporary file in the same
+    directory, which is then renamed over output_file, so readers never see
+    a partially written report.
+    """
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_file)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            writer.writerows(rows)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,10 +1,15 @@
 import re
-import csv
-import sys
 import os
+import argparse
+from itertools import islice
 
-def remove_comments(lines):
-    cleaned_lines = []
+from csv_stream import iter_file_list, count_written_rows, write_csv_rows, parse_flush_every
+from mapped_source import EOL_RE, map_file, is_ascii, decode_source
+from sharding import add_shard_argument, filter_shard, shard_output_path
+from walker import SolFileIndex, add_ignore_arguments, ignore_rules_from_args
+
+def iter_cleaned_lines(lines):
+    """Yield the non-empty lines of an iterable of lines with comments removed."""
     block_comment = False
 
     for line in lines:
@@ -22,125 +27,217 @@ def remove_comments(lines):
         line = re.sub(r"//.*", "", line).strip()
 
         if line:  # Avoid adding empty lines
-            cleaned_lines.append(line)
+            yield line
 
-    return cleaned_lines
+def remove_comments(lines):
+    return list(iter_cleaned_lines(lines))
 
-def count_decision_points(cleaned_lines):
+# Kinds of decision points and their CSV column names, in output order
+DECISION_KINDS = {
+    "if": "If",
+    "else": "Else",
+    "for": "For",
+    "while": "While",
+    "require": "Require",
+    "assert": "Assert",
+    "revert": "Revert",
+    "ternary": "Ternary",
+    "and": "&&",
+    "or": "||",
+}
+
+# A single alternation, so each line is scanned once. Keywords share one \b
+# and are captured in group 1 or 2, and the kind is looked up from the
+# matched text. String literals are matched first and skipped, so a ? or
+# keyword inside a message is not counted. No part of a match can span a
+# line ending, so runs of lines can be scanned at once.
+DECISION_PATTERN = (
+    r'"(?:[^"\\\r\n]|\\[^\r\n])*"|\'(?:[^\'\\\r\n]|\\[^\r\n])*\''
+    r"|\b(?:(if|else|revert)\b|(for|while|require|assert){space}*\()"
+    r"|\?|&&|\|\|"
+)
+DECISION_RE = re.compile(DECISION_PATTERN.format(space=r"[^\S\r\n]"))
+# Whitespace as str.strip() sees it in ASCII text
+DECISION_BYTES_RE = re.compile(DECISION_PATTERN.format(space=r"[ \t\x0b\x0c\x1c-\x1f]").encode())
+
+# Any comment marker. Runs of lines without one are scanned in one go
+COMMENT_MARKER_RE = re.compile(rb"//|/\*|\*/")
+
+# Matched text of each kind of decision point
+DECISION_TOKENS = {
+    "if": "if",
+    "else": "else",
+    "for": "for",
+    "while": "while",
+    "require": "require",
+    "assert": "assert",
+    "revert": "revert",
+    "?": "ternary",
+    "&&": "and",
+    "||": "or",
+}
+DECISION_BYTE_TOKENS = {token.encode(): kind for token, kind in DECISION_TOKENS.items()}
+
+def count_decision_kinds(cleaned_lines):
     """
-    Count occurrences of decision points
+    Count every occurrence of each kind of decision point
     """
-    # Keywords indicating decision points
-    decision_patterns = [r"\bif\b", r"\belse\b", r"\bwhile\s*\(", r"\bfor\s*\(",
-                         r"\brequire\s*\(", r"\bassert\s*\(", r"\brevert\b"]
-    count = 0
+    counts = dict.fromkeys(DECISION_KINDS, 0)
     
-    # Count occurrences of decision-making statements
     for line in cleaned_lines:
-        if any(re.search(pattern, line) for pattern in decision_patterns):
-            count += 1
+        for match in DECISION_RE.finditer(line):
+            kind = DECISION_TOKENS.get(match.group(match.lastindex or 0))
+            if kind:  # None for string literals
+                counts[kind] += 1
             
-    return count
+    return counts
+
+def count_decision_kinds_in_buffer(buf):
+    """
+    Count decision points of each kind directly in mapped bytes, skipping
+    comments the same way remove_comments does
+    """
+    if not is_ascii(buf):
+        # Non-ASCII word characters and undecodable bytes need the text rules
+        return count_decision_kinds(iter_cleaned_lines(decode_source(buf).split('\n')))
+    
+    counts = dict.fromkeys(DECISION_KINDS, 0)
+    block_comment = False
+    pos = 0  # Start of the first line not handled yet
+    
+    # Only the lines holding a comment marker are handled one at a time
+    for line_start, line_end, next_line in iter_marker_lines(buf):
+        if not block_comment:
+            add_decision_matches(counts, buf, pos, line_start)
+        pos = next_line
+        
+        # Detect the start and end of block comments
+        if buf.find(b"/*", line_start, line_end) >= 0:
+            block_comment = True
+        if buf.find(b"*/", line_start, line_end) >= 0:
+            block_comment = False
+            continue  # Skip this line as it closes a comment
+        
+        if block_comment:
+            continue  # Ignore lines inside block comments
+        
+        # Stop scanning at a single-line comment (//...)
+        comment = buf.find(b"//", line_start, line_end)
+        add_decision_matches(counts, buf, line_start, comment if comment >= 0 else line_end)
+    
+    if not block_comment:
+        add_decision_matches(counts, buf, pos, len(buf))
+    return counts
+
+def iter_marker_lines(buf):
+    """
+    Yield (start, end, next_line) for each line of buf holding a comment
+    marker, where end excludes the line ending and next_line follows it.
+    """
+    pos = 0
+    while True:
+        marker = COMMENT_MARKER_RE.search(buf, pos)
+        if not marker:
+            return
+        start = max(buf.rfind(b"\n", pos, marker.start()), buf.rfind(b"\r", pos, marker.start()), pos - 1) + 1
+        eol = EOL_RE.search(buf, marker.end())
+        if not eol:
+            yield start, len(buf), len(buf)
+            return
+        yield start, eol.start(), eol.end()
+        pos = eol.end()
+
+def add_decision_matches(counts, buf, start, end):
+    """Add the decision points in buf[start:end] to counts."""
+    for match in DECISION_BYTES_RE.finditer(buf, start, end):
+        kind = DECISION_BYTE_TOKENS.get(match.group(match.lastindex or 0))
+        if kind:  # None for string literals
+            counts[kind] += 1
+
+def count_decision_points(cleaned_lines):
+    """
+    Count occurrences of decision points
+    """
+    return sum(count_decision_kinds(cleaned_lines).values())
 
 def read_file_list(csv_file):
     """Read the list of files from a CSV file."""
-    files = []
-    with open(csv_file, 'r') as f:
-        reader = csv.reader(f)
-        # Skip header
-        next(reader, None)
-        for row in reader:
-            if row and row[0]:  # Ensure row is not empty
-                files.append(row[0])
-    return files
+    return list(iter_file_list(csv_file))
 
-def count_decisions_for_file(file_path):
-    """Count decision points for a single file."""
+def count_decision_kinds_for_file(file_path):
+    """Count decision points of each kind for a single file."""
     if not os.path.exists(file_path):
-        return 0
+        return dict.fromkeys(DECISION_KINDS, 0)
         
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-            
-        # Clean comments
-        cleaned_lines = remove_comments(lines)
-        
-        # Count decision points
-        return count_decision_points(cleaned_lines)
+        # Clean comments and count decision points in one pass over the mapped bytes
+        with map_file(file_path) as buf:
+            return count_decision_kinds_in_buffer(buf)
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
-        return 0
+        return dict.fromkeys(DECISION_KINDS, 0)
 
-def count_decisions_for_files(files, search_dir='.'):
-    """Count decision points for each file in the list."""
-    results = []
+def count_decisions_for_file(file_path):
+    """Count decision points for a single file."""
+    return sum(count_decision_kinds_for_file(file_path).values())
+
+def iter_decisions_for_files(files, search_dir='.', ignore=None):
+    """Yield a (file_path, filename, decision_count, kind_counts) result for each file in the list."""
+    index = None
     
     for filename in files:
-        # Check if the filename has a prefix (contains underscore)
-        if '_' in filename:
-            prefix = filename.split('_')[0]
-            actual_filename = filename[len(prefix)+1:]  # +1 for the underscore
-            
-            # Look for the file in the directory with the prefix
-            prefix_dir = os.path.join(search_dir, prefix)
-            if os.path.exists(prefix_dir):
-                found = False
-                for root, _, filenames in os.walk(prefix_dir):
-                    if actual_filename in filenames:
-                        file_path = os.path.join(root, actual_filename)
-                        decision_count = count_decisions_for_file(file_path)
-                        results.append((file_path, filename, decision_count))
-                        found = True
-                        break
-                
-                if not found:
-                    results.append(("Not found", filename, 0))
+        # Index the search directory with one pruned walk, on first use
+        if index is None:
+            index = SolFileIndex(search_dir, ignore)
+        
+        file_path = index.resolve(filename)
+        if file_path:
+            kinds = count_decision_kinds_for_file(file_path)
+            yield (file_path, filename, sum(kinds.values()), kinds)
         else:
-            # For files without prefix, search in all directories
-            found = False
-            for root, _, filenames in os.walk(search_dir):
-                if filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    decision_count = count_decisions_for_file(file_path)
-                    results.append((file_path, filename, decision_count))
-                    found = True
-                    break
-            
             # If file not found, record it with 0 decision points
-            if not found:
-                results.append(("Not found", filename, 0))
-    
-    return results
-
-def write_csv(results, output_file='decision_points.csv'):
-    """Write the parsed results to a CSV file."""
-    with open(output_file, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['Filename', 'Decision Points'])
-        for result in results:
-            writer.writerow([result[1], result[2]])  # Only write filename and decision points
+            yield ("Not found", filename, 0, dict.fromkeys(DECISION_KINDS, 0))
+
+def count_decisions_for_files(files, search_dir='.', ignore=None):
+    """Count decision points for each file in the list."""
+    return list(iter_decisions_for_files(files, search_dir, ignore))
+
+def write_csv(results, output_file='decision_points.csv', flush_every=100, resume=False):
+    """Write the parsed results to a CSV file as they are produced."""
+    # Write filename, total decision points and the per-kind breakdown
+    rows = ([result[1], result[2]] + [result[3][kind] for kind in DECISION_KINDS] for result in results)
+    header = ['Filename', 'Decision Points'] + list(DECISION_KINDS.values())
+    write_csv_rows(rows, output_file, header, flush_every, resume)
     
     print(f"Results written to {output_file}")
 
 def main():
-    # Check command line arguments
-    if len(sys.argv) < 2:
-        print("Usage: python decisions_to_csv.py <file_list.csv> [output_file.csv] [search_directory]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Count decision points for a list of files and write the results to CSV.")
+    parser.add_argument('file_list_csv', help="CSV file with the filenames to process (first column)")
+    parser.add_argument('output_file', nargs='?', default=None, help="Output CSV file (default: decision_points.csv, or a per-shard name with --shard)")
+    parser.add_argument('search_dir', nargs='?', default='.', help="Directory to search for files (default: .)")
+    parser.add_argument('--resume', action='store_true', help="Continue from the last row already written to the output file")
+    parser.add_argument('--flush-every', type=parse_flush_every, default=100, help="Flush the output file every N rows (default: 100)")
+    add_shard_argument(parser)
+    add_ignore_arguments(parser)
+    args = parser.parse_args()
     
-    file_list_csv = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else 'decision_points.csv'
-    search_dir = sys.argv[3] if len(sys.argv) > 3 else '.'
+    if args.output_file is None:
+        args.output_file = shard_output_path('decision_points.csv', args.shard)
     
-    # Read the list of files from the CSV
-    files = read_file_list(file_list_csv)
+    # Stream this shard's part of the file list, skipping rows a previous run already wrote
+    files = filter_shard(iter_file_list(args.file_list_csv), args.shard)
+    if args.resume:
+        done = count_written_rows(args.output_file)
+        if done:
+            print(f"Resuming after {done} rows already in {args.output_file}")
+        files = islice(files, done, None)
     
     # Count decision points for each file
-    results = count_decisions_for_files(files, search_dir)
+    results = iter_decisions_for_files(files, args.search_dir, ignore_rules_from_args(args))
     
     # Write results to CSV
-    write_csv(results, output_file)
+    write_csv(results, args.output_file, args.flush_every, args.resume)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,16 @@
 import re
+import argparse
 from difflib import unified_diff
 from difflib import SequenceMatcher
 
+from mapped_source import map_file, is_ascii, decode_source
+
+# Byte-level equivalent of the comment pattern in remove_comments_and_blank_lines
+COMMENT_BYTES_RE = re.compile(rb'//[^\r\n]*|/\*.*?\*/', flags=re.DOTALL)
+
+# ASCII bytes other than \r and \n that str.splitlines() also breaks lines at
+OTHER_LINE_BREAKS = (b'\x0b', b'\x0c', b'\x1c', b'\x1d', b'\x1e')
+
 def remove_comments_and_blank_lines(code):
     # Remove single-line and multi-line comments
     code = re.sub(r'//.*?$|/\*.*?\*/', '', code, flags=re.DOTALL | re.MULTILINE)
@@ -11,47 +20,43 @@ def remove_comments_and_blank_lines(code):
     code = '\n'.join(line.strip() for line in code.splitlines() if line.strip())
     return code.strip()
 
-def diffcheck(deployed_file_path, audited_file_path):
-    # Read the deployed and audited files
-    with open(deployed_file_path, 'r') as deployed_file:
-        deployed_code = deployed_file.read()
-    
-    with open(audited_file_path, 'r') as audited_file:
-        audited_code = audited_file.read()
-    
-    # Clean the code by removing comments and blank lines
-    clean_deployed = remove_comments_and_blank_lines(deployed_code)
-    clean_audited = remove_comments_and_blank_lines(audited_code)
+def read_clean_lines(file_path):
+    """
+    Read a file as a list of code lines with comments and blank lines removed.
+    Comments are stripped on the mapped bytes and only the remaining lines
+    are decoded to text.
+    """
+    with map_file(file_path) as buf:
+        return clean_lines(buf)
+
+def clean_lines(buf):
+    """Return the code lines of a bytes-like source with comments and blank lines removed."""
+    if not is_ascii(buf) or any(line_break in buf for line_break in OTHER_LINE_BREAKS):
+        # Non-ASCII and other line breaks need the text rules
+        return remove_comments_and_blank_lines(decode_source(buf)).splitlines()
     
-    # Split into lines for comparison
-    deployed_lines = clean_deployed.splitlines()
-    audited_lines = clean_audited.splitlines()
-    
-    # Determine contract SLOC from deployed lines
-    contract_sloc = len(deployed_lines)
-    print(f"Contract SLOC: {contract_sloc}")
+    code = COMMENT_BYTES_RE.sub(b'', buf)
     
+    lines = []
+    for raw_line in code.splitlines():
+        line = raw_line.decode('utf-8', errors='ignore').strip()
+        if line:
+            lines.append(line)
+    return lines
+
+def compare_lines(deployed_lines, audited_lines):
+    """
+    Compare cleaned deployed and audited lines without printing anything.
+    Returns a dict with the diff, line counts and coverage percentage.
+    """
     # Use unified_diff to find differences
     diff = list(unified_diff(deployed_lines, audited_lines, 
                             fromfile='deployed', tofile='audited'))
     
-    # Print the full diff in a more readable format
-    if diff:
-        print("Detailed Diff:")
-        for line in diff:
-            print(line)
-    
     # Count actual additions and deletions (ignoring metadata lines)
     additions = sum(1 for line in diff if line.startswith('+') and not line.startswith('+++'))
     deletions = sum(1 for line in diff if line.startswith('-') and not line.startswith('---'))
     
-    print(f"Lines added: {additions}")
-    print(f"Lines removed: {deletions}")
-    
-    # Calculate total changed lines
-    different_lines = additions + deletions
-    print(f"Total different lines: {different_lines}")
-    
     total_lines = len(deployed_lines)
     
     # Calculate coverage based on matching lines rather than differences
@@ -70,19 +75,83 @@ def diffcheck(deployed_file_path, audited_file_path):
     else:
         contract_coverage = (matching_lines / total_lines) * 25
     
+    return {
+        "contract_sloc": total_lines,
+        "diff": diff,
+        "additions": additions,
+        "deletions": deletions,
+        "different_lines": additions + deletions,
+        "matching_lines": matching_lines,
+        "total_lines": total_lines,
+        "coverage": contract_coverage,
+    }
+
+def compare_files(deployed_file_path, audited_file_path):
+    """Compare a deployed and an audited file after removing comments and blank lines."""
+    return compare_lines(read_clean_lines(deployed_file_path), read_clean_lines(audited_file_path))
+
+def diffcheck(deployed_file_path, audited_file_path):
+    result = compare_files(deployed_file_path, audited_file_path)
+    
+    # Determine contract SLOC from deployed lines
+    print(f"Contract SLOC: {result['contract_sloc']}")
+    
+    # Print the full diff in a more readable format
+    if result["diff"]:
+        print("Detailed Diff:")
+        for line in result["diff"]:
+            print(line)
+    
+    print(f"Lines added: {result['additions']}")
+    print(f"Lines removed: {result['deletions']}")
+    
+    # Calculate total changed lines
+    different_lines = result["different_lines"]
+    print(f"Total different lines: {different_lines}")
+    
     print("\nDiff Summary:")
     if different_lines == 0:
         print("No differences found - files are identical after cleaning")
     else:
-        print(f"Found {different_lines} differences ({additions} additions, {deletions} deletions)")
-        print(f"Matching lines: {matching_lines} out of {total_lines}")
-        print(f"Match percentage: {contract_coverage:.2f}%")
+        print(f"Found {different_lines} differences ({result['additions']} additions, {result['deletions']} deletions)")
+        print(f"Matching lines: {result['matching_lines']} out of {result['total_lines']}")
+        print(f"Match percentage: {result['coverage']:.2f}%")
     
-    return contract_coverage
+    return result["coverage"]
 
-# Example usage
-deployed_file_path = './deployed.sol'
-audited_file_path = './audited.sol'
+def print_commit_ranking(deployed_file_path, repo, paths=None, rev='--all', top=10):
+    """Print the commits of an audited repository that best match a deployed file."""
+    from audit_history import rank_commits
+    
+    results = rank_commits(deployed_file_path, repo, paths, rev, top)
+    if not results:
+        print("No versions of the target paths found in the repository history")
+        return results
+    
+    print(f"Best matching commits for {deployed_file_path}:")
+    for result in results:
+        print(f"{result['commit'][:12]} {result['path']}: "
+              f"{result['matching_lines']} of {result['total_lines']} lines match "
+              f"({result['match_percentage']:.2f}%), "
+              f"{result['additions']} additions, {result['deletions']} deletions")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a deployed contract against its audited source.")
+    parser.add_argument('deployed', nargs='?', default='./deployed.sol', help="Deployed source (default: ./deployed.sol)")
+    parser.add_argument('audited', nargs='?', default='./audited.sol', help="Audited source (default: ./audited.sol)")
+    parser.add_argument('--git-repo', help="Rank the commits of this audited repository instead of comparing against one file")
+    parser.add_argument('--path', action='append', help="Path (git pathspec) of the audited file in the repository, repeatable (default: any file with the deployed file's name)")
+    parser.add_argument('--rev', default='--all', help="Revisions to scan (default: --all)")
+    parser.add_argument('--top', type=int, default=10, help="Number of commits to report (default: 10)")
+    args = parser.parse_args()
+    
+    if args.git_repo:
+        print_commit_ranking(args.deployed, args.git_repo, args.path, args.rev, args.top)
+        return
+    
+    coverage = diffcheck(args.deployed, args.audited)
+    print(f"Coverage: {coverage}%")
 
-coverage = diffcheck(deployed_file_path, audited_file_path)
-print(f"Coverage: {coverage}%")
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 import re
-import subprocess
 import csv
+import argparse
+
+from sharding import add_shard_argument, filter_shard, shard_output_path
+from shared_blocks import add_skip_covered_argument, filter_covered
+from slither_jobs import SlitherJob, job_output_name, run_jobs, add_scheduler_arguments, scheduler_options
+from solc_versions import format_remaps, solc_args, resolve_targets, add_solc_arguments, solc_resolver_from_args
 
 # List of Solidity files to analyze
 sol_files_list = [
@@ -14,112 +19,140 @@ sol_files_list = [
       """
 ]
 
-def generate_slither_report(sol_file_path):
+def slither_function_summary_cmd(sol_file_path, solc=None, version=None):
+    """
+    Build the slither command line for the function-summary printer.
+    With a solc binary, slither uses it instead of the solc on PATH.
+    """
     base_path = sol_file_path.split('/')[0]
-    print(f"Running slither on {base_path}...")
-    cmd = (
-        f'slither "{sol_file_path}" --print function-summary '
-        f'--solc-remaps "@openzeppelin=./{base_path}/@openzeppelin @chainlink=./{base_path}/@chainlink" '
-        f'--solc-args="--via-ir --optimize --optimize-runs 200"'
-        f'&> function-summary.txt'
-    )
-    subprocess.run(cmd, shell=True, check=True)
-
-def process_slither_reports():
+    cmd = [
+        'slither', sol_file_path, '--print', 'function-summary',
+        '--solc-remaps', format_remaps(base_path),
+        f'--solc-args={solc_args(version)}',
+    ]
+    if solc:
+        cmd += ['--solc', solc]
+    return cmd
+
+def parse_function_summary(content, sol_file_path):
+    """Extract per-contract TCC and TEC totals from slither function-summary output."""
     csv_data = []
 
-    for sol_file_path in sol_files_list:
-        try:
-            generate_slither_report(sol_file_path)
-        except subprocess.CalledProcessError as e:
-            print(f"Error processing {sol_file_path}: {e}")
-            continue  # Skip to the next file
+    # Split the content into sections based on "INFO:Printers:"
+    sections = content.split("INFO:Printers:")
 
-        # Read Slither output file
-        with open("function-summary.txt", "r") as f:
-            content = f.read()
+    # Regex to match table rows
+    row_pattern = re.compile(r"^\|(.+)\|$")
+    # Regex to extract contract name
+    contract_name_pattern = re.compile(r"Contract\s+(\w+)")
+
+    # Process each section
+    for section in sections:
+        if not section.strip():
+            continue
+
+        headers = []
+        total_tcc = 0  # Total Cyclomatic Complexity
+        total_tec = 0  # Total External Calls
+
+        lines = section.splitlines()
 
-        # Split the content into sections based on "INFO:Printers:"
-        sections = content.split("INFO:Printers:")
+        # Extract contract name using regex
+        contract_name_match = contract_name_pattern.search(section)
+        contract_name = contract_name_match.group(1) if contract_name_match else "Unknown Contract"
 
-        # Regex to match table rows
-        row_pattern = re.compile(r"^\|(.+)\|$")
-        # Regex to extract contract name
-        contract_name_pattern = re.compile(r"Contract\s+(\w+)")
+        # Skip processing if contract name is "Unknown Contract"
+        if contract_name == "Unknown Contract":
+            continue
 
-        # Process each section
-        for section in sections:
-            if not section.strip():
+        # Extract header row
+        for line in lines:
+            if "Function" in line and "Cyclomatic Complexity" in line:
+                headers = [h.strip() for h in line.split("|")[1:-1]]
                 continue
 
-            headers = []
-            total_tcc = 0  # Total Cyclomatic Complexity
-            total_tec = 0  # Total External Calls
+            # Extract table data
+            match = row_pattern.match(line)
+            if match:
+                row_values = [v.strip() for v in match.group(1).split("|")]
+
+                if len(row_values) == len(headers):  # Ensure row matches header count
+                    func_data = dict(zip(headers, row_values))
+
+                    # Extract Cyclomatic Complexity (TCC)
+                    try:
+                        tcc = int(func_data.get("Cyclomatic Complexity", "0"))
+                    except ValueError:
+                        tcc = 0
+
+                    # Extract Total External Calls (TEC)
+                    try:
+                        external_calls = func_data.get("External Calls", "[]")
+                        if external_calls and external_calls != "[]":
+                            tec = len(eval(external_calls))  # Convert string list to actual list and count
+                        else:
+                            tec = 0
+                    except:
+                        tec = 0  # Fallback if parsing fails
+
+                    # Sum totals
+                    total_tcc += tcc
+                    total_tec += tec
+
+        # Extract base path and filename
+        base_path_filename = f"{sol_file_path.split('/')[0]}_{contract_name}.sol"
+
+        # Add contract data to CSV data
+        csv_data.append({
+            "contract": f"{contract_name}.sol",
+            "total_tcc": total_tcc,
+            "total_tec": total_tec,
+            "base_path_filename": base_path_filename
+        })
+
+        # Print section results
+        print("=====================================")
+        print(f"Contract Name: {contract_name}")
+        print(f"✅ Total Cyclomatic Complexity (TCC): {total_tcc}")
+        print(f"✅ Total External Calls (TEC): {total_tec}")
+        print("=====================================")
+
+    return csv_data
+
+def process_slither_reports(sol_files=None, resolver=None, **scheduler_kwargs):
+    """Run the function-summary printer on each file and return the parsed rows."""
+    csv_data = []
+    sol_files = sol_files_list if sol_files is None else sol_files
+
+    # Pick each target's compiler from its pragmas, so mixed versions run side by side
+    if resolver is not None:
+        resolutions = resolve_targets(sol_files, resolver)
+    else:
+        resolutions = {sol_file_path: (None, None) for sol_file_path in sol_files}
+
+    # Run slither on every file through the scheduler, one output file per target
+    jobs = []
+    for sol_file_path in sol_files:
+        version, solc = resolutions[sol_file_path]
+        jobs.append(SlitherJob(sol_file_path, slither_function_summary_cmd(sol_file_path, solc, version),
+                               job_output_name(sol_file_path, "_function-summary.txt"), compiler=version))
+    run_jobs(jobs, **scheduler_kwargs)
+
+    for job in jobs:
+        if job.status != "ok":
+            continue  # Skip to the next file
 
-            lines = section.splitlines()
+        # Read Slither output file
+        with open(job.output_path, "r") as f:
+            content = f.read()
 
-            # Extract contract name using regex
-            contract_name_match = contract_name_pattern.search(section)
-            contract_name = contract_name_match.group(1) if contract_name_match else "Unknown Contract"
+        csv_data.extend(parse_function_summary(content, job.name))
 
-            # Skip processing if contract name is "Unknown Contract"
-            if contract_name == "Unknown Contract":
-                continue
+    return csv_data
 
-            # Extract header row
-            for line in lines:
-                if "Function" in line and "Cyclomatic Complexity" in line:
-                    headers = [h.strip() for h in line.split("|")[1:-1]]
-                    continue
-
-                # Extract table data
-                match = row_pattern.match(line)
-                if match:
-                    row_values = [v.strip() for v in match.group(1).split("|")]
-
-                    if len(row_values) == len(headers):  # Ensure row matches header count
-                        func_data = dict(zip(headers, row_values))
-
-                        # Extract Cyclomatic Complexity (TCC)
-                        try:
-                            tcc = int(func_data.get("Cyclomatic Complexity", "0"))
-                        except ValueError:
-                            tcc = 0
-
-                        # Extract Total External Calls (TEC)
-                        try:
-                            external_calls = func_data.get("External Calls", "[]")
-                            if external_calls and external_calls != "[]":
-                                tec = len(eval(external_calls))  # Convert string list to actual list and count
-                            else:
-                                tec = 0
-                        except:
-                            tec = 0  # Fallback if parsing fails
-
-                        # Sum totals
-                        total_tcc += tcc
-                        total_tec += tec
-
-            # Extract base path and filename
-            base_path_filename = f"{sol_file_path.split('/')[0]}_{contract_name}.sol"
-
-            # Add contract data to CSV data
-            csv_data.append({
-                "contract": f"{contract_name}.sol",
-                "total_tcc": total_tcc,
-                "total_tec": total_tec,
-                "base_path_filename": base_path_filename
-            })
-
-            # Print section results
-            print("=====================================")
-            print(f"Contract Name: {contract_name}")
-            print(f"✅ Total Cyclomatic Complexity (TCC): {total_tcc}")
-            print(f"✅ Total External Calls (TEC): {total_tec}")
-            print("=====================================")
-
-    # Write the CSV data to a file
-    with open("function_summary.csv", "w", newline='') as csvfile:
+def write_function_summary_csv(csv_data, output_csv="function_summary.csv"):
+    """Write the rows returned by process_slither_reports to a CSV file."""
+    with open(output_csv, "w", newline='') as csvfile:
         fieldnames = ["contract", "total_tcc", "total_tec", "base_path_filename"]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
 
@@ -165,6 +198,27 @@ def filter_function_summary():
         for entry in unique_entries.values():
             writer.writerow(entry)
 
+def main():
+    parser = argparse.ArgumentParser(description="Summarise slither function-summary output per contract.")
+    add_scheduler_arguments(parser)
+    add_shard_argument(parser)
+    add_skip_covered_argument(parser)
+    add_solc_arguments(parser)
+    parser.add_argument('--filter-only', action='store_true',
+                        help="Skip slither and only filter an existing (e.g. merged) function_summary.csv")
+    args = parser.parse_args()
+
+    if not args.filter_only:
+        sol_files = list(filter_covered(filter_shard(sol_files_list, args.shard), args.skip_covered))
+        output_csv = shard_output_path("function_summary.csv", args.shard)
+        csv_data = process_slither_reports(sol_files, solc_resolver_from_args(args), **scheduler_options(args))
+        write_function_summary_csv(csv_data, output_csv)
+
+    # Filtering against the duplicate report needs every shard's rows
+    if args.shard is None:
+        filter_function_summary()
+    else:
+        print("Merge the shard outputs with sharding.py, then run again with --filter-only")
+
 if __name__ == "__main__":
-    process_slither_reports()
-    filter_function_summary()
+    main()
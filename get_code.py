@@ -1,8 +1,10 @@
-import requests
 import sys
 import json
 import os
 
+class EtherscanError(Exception):
+    """Raised when Etherscan does not return the source code of a contract."""
+
 def get_contract_address(contract_name=None):
     # Placeholder for contract addresses
     contract_addresses = {
@@ -14,16 +16,24 @@ def get_contract_address(contract_name=None):
     
     return contract_addresses.get(contract_name)
 
-def save_contract_source(contract_address, file_name, api_key):
+def fetch_contract_source(contract_address, api_key):
+    """Fetch the raw SourceCode field of a verified contract from Etherscan."""
+    # Imported here so the rest of the module can be used without requests
+    import requests
+    
     url = f"https://api.etherscan.io/api?module=contract&action=getsourcecode&address={contract_address}&apikey={api_key}"
     response = requests.get(url).json()
     
     if response["status"] != "1":
-        print(f"Error: {response['message']}")
-        sys.exit(1)
-    
-    source_code = response["result"][0]["SourceCode"]
+        raise EtherscanError(response['message'])
     
+    return response["result"][0]["SourceCode"]
+
+def parse_contract_sources(source_code):
+    """
+    Split a SourceCode field into its files.
+    Returns {path: content} for multi-file contracts, or None for a single file.
+    """
     if source_code.startswith("{") and source_code.endswith("}"):
         try:
             if source_code.startswith("{{") and source_code.endswith("}}"):
@@ -32,44 +42,65 @@ def save_contract_source(contract_address, file_name, api_key):
             source_json = json.loads(source_code)
             
             if "sources" in source_json:
-                base_dir = file_name
-                os.makedirs(base_dir, exist_ok=True)
-                
-                for file_path, content in source_json["sources"].items():
-                    full_path = os.path.join(base_dir, file_path)
-                    dir_name = os.path.dirname(full_path)
-                    os.makedirs(dir_name, exist_ok=True)
-                    
-                    with open(full_path, "w") as file:
-                        file.write(content["content"])
-                    
-                    print(f"Saved: {full_path}")
-                return
+                return {file_path: content["content"] for file_path, content in source_json["sources"].items()}
         except json.JSONDecodeError:
             pass
     
+    return None
+
+def save_contract_source(contract_address, file_name, api_key):
+    """Fetch a contract and save its source under file_name. Returns the saved paths."""
+    source_code = fetch_contract_source(contract_address, api_key)
+    sources = parse_contract_sources(source_code)
+    
+    if sources is not None:
+        base_dir = file_name
+        os.makedirs(base_dir, exist_ok=True)
+        
+        saved = []
+        for file_path, content in sources.items():
+            full_path = os.path.join(base_dir, file_path)
+            dir_name = os.path.dirname(full_path)
+            os.makedirs(dir_name, exist_ok=True)
+            
+            with open(full_path, "w") as file:
+                file.write(content)
+            
+            print(f"Saved: {full_path}")
+            saved.append(full_path)
+        return saved
+    
     with open(f"{file_name}.sol", "w") as file:
         file.write(source_code)
     
     print(f"Contract saved as {file_name}.sol")
+    return [f"{file_name}.sol"]
 
-# Placeholder for API key
-api_key = "YOUR_API_KEY"
-
-if len(sys.argv) > 1:
-    contract_name = sys.argv[1]
-    contract_address = get_contract_address(contract_name)
-    if contract_address:
-        file_name = contract_name
-        save_contract_source(contract_address, file_name, api_key)
-    else:
-        print(f"Contract '{contract_name}' not found.")
-        sys.exit(1)
-else:
-    all_contracts = get_contract_address()
+def main():
+    # Placeholder for API key, can be overridden with ETHERSCAN_API_KEY
+    api_key = os.environ.get("ETHERSCAN_API_KEY", "YOUR_API_KEY")
     
-    for contract_name, contract_address in all_contracts.items():
-        print(f"Processing contract: {contract_name}")
-        file_name = contract_name
-        save_contract_source(contract_address, file_name, api_key)
-        print(f"Completed processing {contract_name}\n")
+    try:
+        if len(sys.argv) > 1:
+            contract_name = sys.argv[1]
+            contract_address = get_contract_address(contract_name)
+            if contract_address:
+                file_name = contract_name
+                save_contract_source(contract_address, file_name, api_key)
+            else:
+                print(f"Contract '{contract_name}' not found.")
+                sys.exit(1)
+        else:
+            all_contracts = get_contract_address()
+            
+            for contract_name, contract_address in all_contracts.items():
+                print(f"Processing contract: {contract_name}")
+                file_name = contract_name
+                save_contract_source(contract_address, file_name, api_key)
+                print(f"Completed processing {contract_name}\n")
+    except EtherscanError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 import os
-import subprocess
 import json
 import csv
+import argparse
+
+from sharding import add_shard_argument, filter_shard, shard_output_path
+from shared_blocks import add_skip_covered_argument, filter_covered
+from slither_jobs import SlitherJob, job_output_name, run_jobs, add_scheduler_arguments, scheduler_options
+from solc_versions import format_remaps, solc_args, resolve_targets, add_solc_arguments, solc_resolver_from_args
 
 def get_unique_filenames(csv_file_path):
     """Read the CSV file to get a list of unique filenames."""
@@ -47,81 +52,113 @@ def parse_inheritance_json(json_file_path, base_path, unique_filenames):
 
     return inheritance_data
 
-def run_slither_on_files(sol_files_list):
-    """Run slither inheritance analysis on a list of Solidity files."""
+def slither_inheritance_cmd(sol_file_path, json_file_path, solc=None, version=None):
+    """
+    Build the slither command line for the inheritance printer.
+    With a solc binary, slither uses it instead of the solc on PATH.
+    """
+    # Extract the base path from the file path
+    base_path = sol_file_path.split('/')[0]
+    cmd = [
+        'slither', sol_file_path, '--print', 'inheritance',
+        '--solc-remaps', format_remaps(base_path),
+        '--json', json_file_path,
+        f'--solc-args={solc_args(version)}',
+    ]
+    if solc:
+        cmd += ['--solc', solc]
+    return cmd
+
+def run_slither_on_files(sol_files_list, resolver=None, **scheduler_kwargs):
+    """
+    Run slither inheritance analysis on a list of Solidity files.
+    Returns the rows for the unique files, ready for write_inheritance_to_csv.
+    """
     inheritance_data = []  # List to store inheritance depth information
 
     # Get unique filenames from the CSV
     unique_filenames = get_unique_filenames("./duplicate_files_report.csv")
 
+    valid_files = []
     for sol_file_path in sol_files_list:
         if os.path.isfile(sol_file_path) and sol_file_path.endswith('.sol'):
-            print(f"Running slither on {sol_file_path}...")
-            try:
-                # Extract the base path from the file path
-                base_path = sol_file_path.split('/')[0]
-                
-                # Run slither with inheritance printer and additional arguments
-                cmd = (
-                    f'slither "{sol_file_path}" --print inheritance '
-                    f'--solc-remaps "@openzeppelin=./{base_path}/@openzeppelin @chainlink=./{base_path}/@chainlink" '
-                    f'--json {base_path}_inheritance.json '
-                    f'--solc-args="--via-ir --optimize --optimize-runs 200"'
-                )
-                result = subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                print(result.stderr.decode())
-
-                # Parse the JSON output immediately after generating it
-                json_file_path = f"{base_path}_inheritance.json"
-                inheritance_data.extend(parse_inheritance_json(json_file_path, base_path, unique_filenames))
-
-            except subprocess.CalledProcessError as e:
-                print(f"Error running slither on {sol_file_path}: {e}")
-                print(f"Error output: {e.stderr.decode() if e.stderr else 'None'}")
+            valid_files.append(sol_file_path)
         else:
             print(f"Warning: {sol_file_path} is not a valid Solidity file and will be skipped.")
 
-    # Write the inheritance data to a CSV file
-    with open("inheritance_depth.csv", "w", newline='') as csvfile:
-        fieldnames = ["file", "parent", "inheritance_depth"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    # Pick each target's compiler from its pragmas, so mixed versions run side by side
+    if resolver is not None:
+        resolutions = resolve_targets(valid_files, resolver)
+    else:
+        resolutions = {sol_file_path: (None, None) for sol_file_path in valid_files}
 
-        written_files = set()
+    jobs = []
+    for sol_file_path in valid_files:
+        # Slither refuses to overwrite an existing JSON report, so drop stale ones
+        json_file_path = job_output_name(sol_file_path, "_inheritance.json")
+        if os.path.exists(json_file_path):
+            os.remove(json_file_path)
 
+        version, solc = resolutions[sol_file_path]
+        jobs.append(SlitherJob(sol_file_path, slither_inheritance_cmd(sol_file_path, json_file_path, solc, version),
+                               job_output_name(sol_file_path, "_inheritance.log"), compiler=version))
 
+    # Run slither with inheritance printer through the scheduler
+    run_jobs(jobs, **scheduler_kwargs)
 
-        writer.writeheader()
-        for entry in inheritance_data:
-            # Check if the file is in unique_filenames and not already written
-            if entry['file'] in unique_filenames and entry['file'] not in written_files:
-                print("file in unique_filenames")
-                print('file: ', entry['file'])
-                writer.writerow(entry)
-                print('written_files: ', written_files)
-                written_files.add(entry['file'])
-            else:
-                # Construct the parent file name with a prefix
-                parent_file_with_prefix = f"{entry['parent']}_{entry['file']}"
-
-                print('written_files: ', written_files)
-                
-                # Check if the parent file with prefix is in unique_filenames and not already written
-                if parent_file_with_prefix in unique_filenames and parent_file_with_prefix not in written_files:
-                    # Write the entry with the parent as the file
-                    writer.writerow({
-                        "file": parent_file_with_prefix,
-                        "parent": entry['parent'],
-                        "inheritance_depth": entry['inheritance_depth']
-                    })
-                    written_files.add(parent_file_with_prefix)
-                else:
-                    # Optionally log or handle the case where neither condition is met
-                    print(f"Skipping entry: {entry['file']} with parent {entry['parent']}")
+    for job in jobs:
+        if job.status != "ok":
+            with open(job.output_path, "r") as f:
+                print(f"Error output for {job.name}: {f.read() or 'None'}")
+            continue
+
+        # Parse the JSON output of each successful run
+        base_path = job.name.split('/')[0]
+        json_file_path = job_output_name(job.name, "_inheritance.json")
+        inheritance_data.extend(parse_inheritance_json(json_file_path, base_path, unique_filenames))
+
+    rows = filter_unique_entries(inheritance_data, unique_filenames)
 
     # Print or process the inheritance data
     for entry in inheritance_data:
         print(f"File: {entry['file']}, Parent: {entry['parent']}, Inheritance Depth: {entry['inheritance_depth']}")
 
+    return rows
+
+def filter_unique_entries(inheritance_data, unique_filenames):
+    """Keep one row per file in unique_filenames, naming prefixed duplicates after their parent."""
+    rows = []
+    written_files = set()
+
+    for entry in inheritance_data:
+        # Check if the file is in unique_filenames and not already written
+        if entry['file'] in unique_filenames and entry['file'] not in written_files:
+            print("file in unique_filenames")
+            print('file: ', entry['file'])
+            rows.append(entry)
+            print('written_files: ', written_files)
+            written_files.add(entry['file'])
+        else:
+            # Construct the parent file name with a prefix
+            parent_file_with_prefix = f"{entry['parent']}_{entry['file']}"
+
+            print('written_files: ', written_files)
+            
+            # Check if the parent file with prefix is in unique_filenames and not already written
+            if parent_file_with_prefix in unique_filenames and parent_file_with_prefix not in written_files:
+                # Write the entry with the parent as the file
+                rows.append({
+                    "file": parent_file_with_prefix,
+                    "parent": entry['parent'],
+                    "inheritance_depth": entry['inheritance_depth']
+                })
+                written_files.add(parent_file_with_prefix)
+            else:
+                # Optionally log or handle the case where neither condition is met
+                print(f"Skipping entry: {entry['file']} with parent {entry['parent']}")
+
+    return rows
+
 def write_inheritance_to_csv(inheritance_data, csv_file_path):
     """Write the inheritance data to a CSV file."""
 
@@ -134,6 +171,13 @@ def write_inheritance_to_csv(inheritance_data, csv_file_path):
             writer.writerow(entry)
 
 def main():
+    parser = argparse.ArgumentParser(description="Compute inheritance depth per contract with slither.")
+    add_scheduler_arguments(parser)
+    add_shard_argument(parser)
+    add_skip_covered_argument(parser)
+    add_solc_arguments(parser)
+    args = parser.parse_args()
+
     # List of Solidity files to analyze
     sol_files_list = [
 
@@ -148,7 +192,10 @@ def main():
 
     ]
     
-    run_slither_on_files(sol_files_list)
+    # Shards are merged with: python3 sharding.py inheritance_depth.csv inheritance_depth.shard-*.csv --dedupe
+    rows = run_slither_on_files(list(filter_covered(filter_shard(sol_files_list, args.shard), args.skip_covered)),
+                                solc_resolver_from_args(args), **scheduler_options(args))
+    write_inheritance_to_csv(rows, shard_output_path("inheritance_depth.csv", args.shard))
 
 if __name__ == "__main__":
     main()
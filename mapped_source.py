@@ -0,0 +1,109 @@
+import mmap
+import os
+import re
+from contextlib import contextmanager
+
+# Line endings as recognised by Python's universal newlines mode
+EOL_RE = re.compile(rb'\r\n|\r|\n')
+EOL_CHAR_RE = re.compile(rb'[\r\n]')
+
+# Bytes checked at a time by is_ascii, so a mapping is never copied whole
+ASCII_CHUNK = 1 << 20
+
+# Comment markers, in the order the comment-stripping passes look for them
+NORMAL_MARKER_RE = re.compile(rb'//|/\*')
+BLOCK_MARKER_RE = re.compile(rb'//|\*/')
+
+@contextmanager
+def map_file(file_path):
+    """
+    Map a file read-only and yield the mapping.
+    The mapping supports find(), slicing, memoryview() and the re module, so
+    callers can work on the bytes without reading or decoding the file.
+    Empty files (which cannot be mapped) yield an empty bytes object.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+def is_ascii(buf):
+    """
+    True if buf has only ASCII bytes. For such sources, byte-level processing
+    gives the same results as decoding and working on text.
+    """
+    return all(buf[pos:pos + ASCII_CHUNK].isascii() for pos in range(0, len(buf), ASCII_CHUNK))
+
+def decode_source(buf):
+    """
+    Decode source bytes the way the text-mode readers always have: as UTF-8
+    with undecodable bytes dropped, and \r\n and \r line endings read as \n.
+    """
+    text = bytes(buf).decode('utf-8', errors='ignore')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def iter_code_spans(buf):
+    """
+    Yield (start, end) offsets of the parts of buf that are not comments.
+    This matches removing every // comment first and then every /* */ comment
+    from what is left, which is how unique_files has always stripped comments.
+    """
+    pos = 0
+    size = len(buf)
+    while pos < size:
+        marker = NORMAL_MARKER_RE.search(buf, pos)
+        if not marker:
+            yield pos, size
+            return
+        if marker.start() > pos:
+            yield pos, marker.start()
+
+        if marker.group() == b'//':
+            # Skip until end of line, keeping the line ending
+            eol = EOL_CHAR_RE.search(buf, marker.start())
+            pos = eol.start() if eol else size
+            continue
+
+        # Skip until end of block comment. A */ only closes the comment if
+        # its '/' does not start a // comment, which would have been removed
+        # before the block comment was looked for.
+        pos = marker.start() + 1
+        while True:
+            end_marker = BLOCK_MARKER_RE.search(buf, pos)
+            if not end_marker:
+                return
+            start = end_marker.start()
+            if end_marker.group() == b'*/' and buf[start + 1:start + 3] != b'//':
+                pos = start + 2
+                break
+            if end_marker.group() == b'*/':
+                start += 1
+            eol = EOL_CHAR_RE.search(buf, start)
+            if not eol:
+                return
+            pos = eol.start()
+
+def iter_code_chunks(buf, view):
+    """
+    Yield the non-comment parts of buf as memoryview slices of view, with
+    \\r\\n and \\r line endings translated to \\n as text mode would.
+    """
+    for start, end in iter_code_spans(buf):
+        pos = start
+        for match in EOL_RE.finditer(buf, start, end):
+            if match.group() != b'\n':
+                yield view[pos:match.start()]
+                yield b'\n'
+                pos = match.end()
+        yield view[pos:end]
+
+def update_hash_with_code(hash_obj, buf):
+    """Feed the non-comment parts of buf to hash_obj without copying them."""
+    with memoryview(buf) as view:
+        chunk = None
+        for chunk in iter_code_chunks(buf, view):
+            hash_obj.update(chunk)
+        # Drop the last slice so the mapping can be closed
+        del chunk
@@ -0,0 +1,49 @@
+"""
+In-process API for the per-file metrics, so other tools can compute them
+for many files without starting one Python process per file.
+
+    from metrics import batch_metrics
+    for result in batch_metrics(paths):
+        print(result["path"], result["sloc"], result["decision_points"])
+"""
+from unique_files import get_file_hash
+from sloc_to_csv import count_sloc_for_file
+from decisions_to_csv import DECISION_KINDS, count_decision_kinds_for_file
+from diffcheck import compare_files
+
+def file_metrics(file_path):
+    """
+    Compute the hash, SLOC and decision points of one file.
+    A file that cannot be read gets "error" set, a hash of None and zero counts.
+    """
+    try:
+        file_hash = get_file_hash(file_path)
+    except OSError as e:
+        return {
+            "path": file_path,
+            "hash": None,
+            "sloc": 0,
+            "decision_points": 0,
+            "decision_kinds": dict.fromkeys(DECISION_KINDS, 0),
+            "error": str(e),
+        }
+    
+    kinds = count_decision_kinds_for_file(file_path)
+    return {
+        "path": file_path,
+        "hash": file_hash,
+        "sloc": count_sloc_for_file(file_path),
+        "decision_points": sum(kinds.values()),
+        "decision_kinds": kinds,
+        "error": None,
+    }
+
+def batch_metrics(file_paths):
+    """Yield file_metrics() for each path, in order."""
+    for file_path in file_paths:
+        yield file_metrics(file_path)
+
+def batch_diffcheck(file_pairs):
+    """Yield diffcheck.compare_files() for each (deployed, audited) pair, in order."""
+    for deployed_file_path, audited_file_path in file_pairs:
+        yield compare_files(deployed_file_path, audited_file_path)
@@ -0,0 +1,98 @@
+import os
+import csv
+import zlib
+import argparse
+
+from csv_stream import iter_file_list, replace_csv
+
+def parse_shard(spec):
+    """Parse an 'i/N' shard spec (0 <= i < N) into an (i, N) tuple, for argparse."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{spec}', expected i/N")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"invalid shard '{spec}', need 0 <= i < N")
+    return index, count
+
+def add_shard_argument(parser):
+    """Add the shared --shard option to an argparse parser."""
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='i/N',
+                        help="Only process the files in shard i of N (0-based), chosen by a stable hash of the path")
+
+def shard_of(key, count):
+    """Return the shard a path or filename belongs to. Stable across runs and machines."""
+    return zlib.crc32(key.encode('utf-8')) % count
+
+def in_shard(key, shard):
+    """True if key belongs to shard, where shard is an (i, N) tuple or None for all."""
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+def filter_shard(keys, shard):
+    """Yield only the keys that belong to shard."""
+    for key in keys:
+        if in_shard(key, shard):
+            yield key
+
+def shard_output_path(output_file, shard):
+    """Name a shard's output after the normal one, e.g. sloc_count.shard-0-of-4.csv."""
+    if shard is None:
+        return output_file
+    root, ext = os.path.splitext(output_file)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+def merge_csv_shards(output_file, shard_files, order_file=None, dedupe=False):
+    """
+    Combine the CSV outputs of several shards into one file.
+    Rows keep the order of the shard files unless order_file (a file list
+    like duplicate_files_report.csv) is given, in which case rows follow the
+    order of the first column in that list. With dedupe, only the first row
+    for each first-column value is kept.
+    """
+    header = None
+    rows = []
+    for shard_file in shard_files:
+        with open(shard_file, 'r', newline='') as f:
+            reader = csv.reader(f)
+            shard_header = next(reader, None)
+            if shard_header is None:
+                continue
+            if header is None:
+                header = shard_header
+            elif shard_header != header:
+                raise ValueError(f"{shard_file} has header {shard_header}, expected {header}")
+            rows.extend(row for row in reader if row)
+
+    if order_file:
+        rank = {}
+        for filename in iter_file_list(order_file):
+            rank.setdefault(filename, len(rank))
+        rows.sort(key=lambda row: rank.get(row[0], len(rank)))
+
+    if dedupe:
+        seen = set()
+        unique_rows = []
+        for row in rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                unique_rows.append(row)
+        rows = unique_rows
+
+    replace_csv(output_file, header or [], rows)
+    return len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the CSV outputs of sharded sloc_to_csv, decisions_to_csv, function_summary or get_inheritance runs.")
+    parser.add_argument('output_file', help="Merged CSV file to write")
+    parser.add_argument('shard_files', nargs='+', help="CSV outputs of the individual shards")
+    parser.add_argument('--order', help="File list whose first column gives the row order (e.g. duplicate_files_report.csv)")
+    parser.add_argument('--dedupe', action='store_true', help="Keep only the first row for each value in the first column")
+    args = parser.parse_args()
+
+    count = merge_csv_shards(args.output_file, args.shard_files, args.order, args.dedupe)
+    print(f"Merged {count} rows from {len(args.shard_files)} shards into {args.output_file}")
+
+if __name__ == "__main__":
+    main()
+
+#sample command : python3 sharding.py sloc_count.csv sloc_count.shard-*.csv --order duplicate_files_report.csv
@@ -0,0 +1,230 @@
+import os
+import csv
+import hashlib
+import argparse
+from array import array
+
+from csv_stream import write_csv_rows
+from diffcheck import COMMENT_BYTES_RE
+from mapped_source import map_file, EOL_CHAR_RE
+from walker import iter_sol_files, add_ignore_arguments, ignore_rules_from_args
+
+# Rabin-Karp parameters: windows of lines hashed modulo the Mersenne prime 2^61 - 1
+DEFAULT_WINDOW = 5
+MODULUS = (1 << 61) - 1
+BASE = 1_000_003
+
+REPORT_HEADER = ["Path", "Lines", "Novel Lines", "Seen Lines", "Shared With"]
+BLOCKS_HEADER = ["Path", "Start Line", "End Line", "Lines", "Source Path", "Source Start Line"]
+
+def iter_numbered_code_lines(buf):
+    """
+    Yield (line_number, line) for the code lines of a source with comments
+    removed (as in diffcheck), surrounding whitespace stripped and blank
+    lines skipped. Comments are replaced by their line endings so line
+    numbers are kept.
+    """
+    code = COMMENT_BYTES_RE.sub(lambda match: b''.join(EOL_CHAR_RE.findall(match.group())), buf)
+    for line_number, raw_line in enumerate(code.splitlines(), 1):
+        line = raw_line.strip()
+        if line:
+            yield line_number, line
+
+def line_hash(line):
+    """A stable 64-bit hash of one normalized line, reduced modulo MODULUS."""
+    return int.from_bytes(hashlib.blake2b(line, digest_size=8).digest(), 'little') % MODULUS
+
+def iter_window_hashes(line_hashes, window=DEFAULT_WINDOW):
+    """Yield (start, hash) for every run of `window` consecutive lines, rolling the hash one line at a time."""
+    if len(line_hashes) < window:
+        return
+
+    # Weight of the line that leaves the window
+    leading_power = pow(BASE, window - 1, MODULUS)
+    value = 0
+    for i, line_value in enumerate(line_hashes):
+        if i >= window:
+            value = (value - line_hashes[i - window] * leading_power) % MODULUS
+        value = (value * BASE + line_value) % MODULUS
+        if i >= window - 1:
+            yield i - window + 1, value
+
+def read_line_hashes(file_path):
+    """Return the line numbers and line hashes of a file's normalized code lines."""
+    line_numbers = array('I')
+    line_hashes = array('Q')
+    with map_file(file_path) as buf:
+        for line_number, line in iter_numbered_code_lines(buf):
+            line_numbers.append(line_number)
+            line_hashes.append(line_hash(line))
+    return line_numbers, line_hashes
+
+class SharedBlockIndex:
+    """
+    An index of every window of normalized lines seen so far, built one file
+    at a time. Lines of a file covered by a window that an earlier file
+    already had are "seen", the rest are "novel". Each window is stored once,
+    as the file and line where it first appeared, so the whole corpus is
+    indexed in time linear in its number of lines. The window hashes of each
+    file are kept too, so a shared block keeps following the file it started
+    in for as long as both files continue alike.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.paths = []
+        self.line_numbers = []
+        self.window_hashes = []
+        self.first_seen = {}  # Window hash -> file index << 32 | line index
+        self.results = []
+        self.blocks = []
+
+    def add_file(self, file_path):
+        """Index one file and return its result dict."""
+        file_id = len(self.paths)
+        line_numbers, line_hashes = read_line_hashes(file_path)
+        window_hashes = array('Q', (value for _, value in iter_window_hashes(line_hashes, self.window)))
+        self.paths.append(file_path)
+        self.line_numbers.append(line_numbers)
+        self.window_hashes.append(window_hashes)
+
+        seen_lines = 0
+        covered_until = 0
+        shared_with = set()
+        block = None
+        for start, value in enumerate(window_hashes):
+            end = start + self.window
+
+            # Extend the current block while its source continues with the same window
+            if block:
+                source_windows = self.window_hashes[block["source_id"]]
+                if block["source_next"] < len(source_windows) and source_windows[block["source_next"]] == value:
+                    seen_lines += end - covered_until
+                    covered_until = block["end"] = end
+                    block["source_next"] += 1
+                    continue
+
+            location = self.first_seen.get(value)
+            if location is None or location >> 32 == file_id:
+                # Not seen before, or only repeated within this file
+                block = None
+                continue
+
+            # Start a new block after the lines already covered, so blocks never overlap
+            source_id, source_start = location >> 32, location & 0xFFFFFFFF
+            block_start = max(start, covered_until)
+            seen_lines += end - block_start
+            covered_until = end
+            shared_with.add(source_id)
+            block = {"start": block_start, "end": end, "source_id": source_id,
+                     "source_start": source_start + block_start - start, "source_next": source_start + 1}
+            self.blocks.append((file_id, block))
+
+        for start, value in enumerate(window_hashes):
+            self.first_seen.setdefault(value, file_id << 32 | start)
+
+        result = {
+            "path": file_path,
+            "lines": len(line_hashes),
+            "novel_lines": len(line_hashes) - seen_lines,
+            "seen_lines": seen_lines,
+            "shared_with": shared_with,
+        }
+        for source_id in shared_with:
+            self.results[source_id]["shared_with"].add(file_id)
+        self.results.append(result)
+        return result
+
+    def relative_paths(self, root_dir='.'):
+        """The indexed paths relative to root_dir, by file index."""
+        return [os.path.relpath(path, root_dir) for path in self.paths]
+
+    def iter_block_rows(self, root_dir='.'):
+        """Yield a BLOCKS_HEADER row for every block a file shares with an earlier file."""
+        rel_paths = self.relative_paths(root_dir)
+        for file_id, block in self.blocks:
+            line_numbers = self.line_numbers[file_id]
+            source_line_numbers = self.line_numbers[block["source_id"]]
+            yield [
+                rel_paths[file_id],
+                line_numbers[block["start"]],
+                line_numbers[block["end"] - 1],
+                block["end"] - block["start"],
+                rel_paths[block["source_id"]],
+                source_line_numbers[block["source_start"]],
+            ]
+
+    def iter_report_rows(self, root_dir='.'):
+        """Yield a REPORT_HEADER row for every indexed file."""
+        rel_paths = self.relative_paths(root_dir)
+        for file_id, result in enumerate(self.results):
+            yield [
+                rel_paths[file_id],
+                result["lines"],
+                result["novel_lines"],
+                result["seen_lines"],
+                ";".join(sorted(rel_paths[other_id] for other_id in result["shared_with"])),
+            ]
+
+def build_shared_block_index(root_dir, window=DEFAULT_WINDOW, ignore=None):
+    """Index every .sol file under root_dir, in walk order."""
+    index = SharedBlockIndex(window)
+    for entry in iter_sol_files(root_dir, ignore):
+        try:
+            index.add_file(entry.path)
+        except OSError as e:
+            print(f"Error reading file {entry.path}: {e}")
+    return index
+
+def load_covered_files(report_csv):
+    """
+    Return the paths in a shared-blocks report whose code was all seen in
+    earlier files, so per-file analyses can skip them.
+    """
+    covered = set()
+    with open(report_csv, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            if int(row["Lines"]) > 0 and int(row["Novel Lines"]) == 0:
+                covered.add(os.path.normpath(row["Path"]))
+    return covered
+
+def filter_covered(paths, report_csv):
+    """Yield only the paths that are not fully covered according to report_csv (None keeps all)."""
+    covered = load_covered_files(report_csv) if report_csv else set()
+    for path in paths:
+        if os.path.normpath(path) in covered:
+            print(f"Skipping {path}: all of its code was seen in earlier files")
+            continue
+        yield path
+
+def add_skip_covered_argument(parser):
+    """Add the shared --skip-covered option to an argparse parser."""
+    parser.add_argument('--skip-covered', metavar='REPORT',
+                        help="Skip files that a shared_blocks.py report lists with no novel lines")
+
+def main():
+    parser = argparse.ArgumentParser(description="Find blocks of code shared between Solidity files and count novel lines per file.")
+    parser.add_argument('directory', nargs='?', default='.', help="Directory to scan (default: .)")
+    parser.add_argument('--output', default="shared_blocks.csv", help="Per-file report (default: shared_blocks.csv)")
+    parser.add_argument('--blocks-csv', help="Also write every shared block with its line range and source")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help=f"Lines per hashed window, the shortest block reported (default: {DEFAULT_WINDOW})")
+    add_ignore_arguments(parser)
+    args = parser.parse_args()
+
+    index = build_shared_block_index(args.directory, args.window, ignore_rules_from_args(args))
+
+    write_csv_rows(index.iter_report_rows(args.directory), args.output, REPORT_HEADER)
+    print(f"Results written to {args.output}")
+    if args.blocks_csv:
+        write_csv_rows(index.iter_block_rows(args.directory), args.blocks_csv, BLOCKS_HEADER)
+        print(f"Shared blocks written to {args.blocks_csv}")
+
+    total = sum(result["lines"] for result in index.results)
+    novel = sum(result["novel_lines"] for result in index.results)
+    covered = sum(1 for result in index.results if result["lines"] and not result["novel_lines"])
+    print(f"{len(index.results)} files, {novel} of {total} lines novel, {covered} files fully covered by earlier files")
+
+if __name__ == "__main__":
+    main()
+
+#sample command : python3 shared_blocks.py . --blocks-csv shared_blocks_detail.csv
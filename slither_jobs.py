@@ -0,0 +1,206 @@
+import os
+import signal
+import hashlib
+import subprocess
+import time
+
+from walker import iter_sol_files
+
+# Defaults for the scheduler, overridable from the command line of each runner
+DEFAULT_TIMEOUT = 30 * 60  # seconds
+DEFAULT_RAM_BUDGET = 8 * 1024 ** 3  # bytes
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Rough peak memory of a via-IR compile: a floor plus a multiple of the source size
+MIN_JOB_MEMORY = 512 * 1024 ** 2
+MEMORY_PER_SOURCE_BYTE = 2000
+
+_project_sizes = {}
+
+def estimate_source_size(sol_file_path):
+    """
+    Estimate how much source a slither run on sol_file_path compiles: the
+    total size of the .sol files in its project directory (the first path
+    component, which is also where the remappings point).
+    """
+    base_path = sol_file_path.split('/')[0]
+    if not os.path.isdir(base_path):
+        return os.path.getsize(sol_file_path) if os.path.isfile(sol_file_path) else 0
+
+    if base_path not in _project_sizes:
+        _project_sizes[base_path] = sum(entry.stat().st_size for entry in iter_sol_files(base_path))
+    return _project_sizes[base_path]
+
+def job_output_name(sol_file_path, suffix):
+    """
+    Build a per-target output filename, e.g. Comet_contracts_Comet_642e54c2_inheritance.json.
+    Flattened paths can coincide (a_b/C.sol and a/b_C.sol), so a short hash
+    of the normalized path keeps every target's output apart.
+    """
+    path = os.path.normpath(sol_file_path)
+    stem = path[:-len('.sol')] if path.endswith('.sol') else path
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+    return f"{stem.replace(os.sep, '_')}_{digest}{suffix}"
+
+class SlitherJob:
+    """
+    A slither command for one target, with its estimated size and outcome.
+    `compiler` labels the solc version the command uses, for the summary.
+    """
+
+    def __init__(self, name, cmd, output_path, source_size=None, compiler=None):
+        self.name = name
+        self.cmd = cmd
+        self.output_path = output_path
+        self.compiler = compiler
+        self.source_size = estimate_source_size(name) if source_size is None else source_size
+        self.memory = max(MIN_JOB_MEMORY, self.source_size * MEMORY_PER_SOURCE_BYTE)
+
+        # Filled in by run_jobs
+        self.status = "pending"
+        self.returncode = None
+        self.elapsed = None
+        self._process = None
+        self._output = None
+        self._started = None
+
+    def start(self):
+        # stdout and stderr both go to the output file, like `&>`. A new
+        # session lets a timeout kill solc along with slither.
+        self._output = open(self.output_path, "w")
+        try:
+            self._process = subprocess.Popen(self.cmd, stdout=self._output, stderr=subprocess.STDOUT,
+                                             start_new_session=True)
+        except OSError:
+            self._output.close()
+            self.status = "failed"
+            raise
+        self._started = time.monotonic()
+        self.status = "running"
+
+    def poll(self, timeout):
+        """Return True once the job has finished, killing it if it ran past timeout."""
+        returncode = self._process.poll()
+        elapsed = time.monotonic() - self._started
+
+        if returncode is None:
+            if elapsed <= timeout:
+                return False
+            os.killpg(self._process.pid, signal.SIGKILL)
+            returncode = self._process.wait()
+            self.status = "timeout"
+        else:
+            self.status = "ok" if returncode == 0 else "failed"
+
+        self.returncode = returncode
+        self.elapsed = elapsed
+        self._output.close()
+        return True
+
+    def kill(self):
+        """Kill a running job and its solc processes, e.g. when the run is interrupted."""
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.returncode = self._process.wait()
+        self.elapsed = time.monotonic() - self._started
+        self.status = "killed"
+        self._output.close()
+
+def run_jobs(jobs, max_workers=DEFAULT_WORKERS, ram_budget=DEFAULT_RAM_BUDGET,
+             timeout=DEFAULT_TIMEOUT, poll_interval=0.5):
+    """
+    Run slither jobs concurrently, largest first.
+    A job is started only while the estimated memory of the running jobs
+    stays within ram_budget (a job that is too big on its own still runs,
+    alone). Jobs that run longer than timeout seconds are killed and marked
+    "timeout". Returns a summary dict; each job's status is updated in place.
+    """
+    pending = sorted(jobs, key=lambda job: job.source_size, reverse=True)
+    running = []
+    depth_samples = []
+    started = time.monotonic()
+
+    # Each job runs in its own session, so Ctrl-C in the terminal does not
+    # reach slither or solc. Kill whatever is still running on the way out.
+    try:
+        while pending or running:
+            # Admit jobs in size order, filling the remaining budget with smaller ones
+            in_use = sum(job.memory for job in running)
+            i = 0
+            while i < len(pending) and len(running) < max_workers:
+                job = pending[i]
+                if running and in_use + job.memory > ram_budget:
+                    i += 1
+                    continue
+                del pending[i]
+                print(f"Running slither on {job.name}...")
+                try:
+                    job.start()
+                except OSError as e:
+                    print(f"Error running slither on {job.name}: {e}")
+                    continue
+                running.append(job)
+                in_use += job.memory
+
+            depth_samples.append(len(pending))
+            time.sleep(poll_interval)
+
+            for job in list(running):
+                if job.poll(timeout):
+                    running.remove(job)
+                    if job.status != "ok":
+                        print(f"Error running slither on {job.name}: {job.status} "
+                              f"(exit code {job.returncode}) after {job.elapsed:.0f}s, see {job.output_path}")
+    finally:
+        for job in running:
+            job.kill()
+            print(f"Killed slither on {job.name}")
+
+    elapsed = time.monotonic() - started
+    summary = {
+        "jobs": len(jobs),
+        "ok": sum(1 for job in jobs if job.status == "ok"),
+        "failed": sum(1 for job in jobs if job.status == "failed"),
+        "timeout": sum(1 for job in jobs if job.status == "timeout"),
+        "max_queue_depth": max(depth_samples, default=0),
+        "mean_queue_depth": sum(depth_samples) / len(depth_samples) if depth_samples else 0,
+        "elapsed": elapsed,
+        "jobs_per_minute": len(jobs) / elapsed * 60 if elapsed else 0,
+        "by_compiler": {},
+    }
+    for job in jobs:
+        if job.compiler:
+            counts = summary["by_compiler"].setdefault(job.compiler, {"jobs": 0, "ok": 0})
+            counts["jobs"] += 1
+            counts["ok"] += job.status == "ok"
+    print_summary(summary)
+    return summary
+
+def print_summary(summary):
+    print("=====================================")
+    print(f"Slither jobs: {summary['jobs']} ({summary['ok']} ok, {summary['failed']} failed, "
+          f"{summary['timeout']} timed out)")
+    print(f"Queue depth: max {summary['max_queue_depth']}, mean {summary['mean_queue_depth']:.1f}")
+    print(f"Throughput: {summary['jobs_per_minute']:.2f} jobs/min over {summary['elapsed']:.0f}s")
+    for compiler, counts in sorted(summary["by_compiler"].items()):
+        print(f"solc {compiler}: {counts['ok']} of {counts['jobs']} jobs ok")
+    print("=====================================")
+
+def add_scheduler_arguments(parser):
+    """Add the shared --jobs, --ram-budget and --timeout options to an argparse parser."""
+    parser.add_argument('--jobs', type=int, default=DEFAULT_WORKERS,
+                        help=f"Maximum concurrent slither runs (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--ram-budget', type=float, default=DEFAULT_RAM_BUDGET / 1024 ** 3,
+                        help=f"Estimated memory budget in GiB (default: {DEFAULT_RAM_BUDGET // 1024 ** 3})")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Seconds before a slither run is killed (default: {DEFAULT_TIMEOUT})")
+
+def scheduler_options(args):
+    """Turn the parsed scheduler options into run_jobs keyword arguments."""
+    return {
+        "max_workers": args.jobs,
+        "ram_budget": int(args.ram_budget * 1024 ** 3),
+        "timeout": args.timeout,
+    }
@@ -0,0 +1,130 @@
+"""
+Vectorized SLOC counting for many files at once, with NumPy.
+
+The files of a batch are joined into one byte buffer and every line is
+classified with array operations instead of a Python loop per line. Files
+with non-ASCII bytes are counted one at a time with the text rules of
+sloc_to_csv instead. The counts match sloc_to_csv.count_sloc_for_file.
+NumPy is optional and is only imported when a batch is counted.
+
+    from sloc_numpy import count_sloc_batch
+    counts = count_sloc_batch(["A/Token.sol", "B/Token.sol"])
+"""
+import os
+
+def numpy_available():
+    """True if NumPy can be imported."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def read_batch(file_paths):
+    """
+    Read files into one buffer, each followed by a newline so no line or
+    comment marker spans two files. Missing or unreadable files count as
+    empty. Files with non-ASCII bytes are left out of the buffer (as empty)
+    and returned separately. Returns the buffer, the offset at which each
+    file starts and {index: content} for the left-out files.
+    """
+    parts = []
+    starts = []
+    non_ascii = {}
+    offset = 0
+    for index, file_path in enumerate(file_paths):
+        content = b''
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'rb') as f:
+                    content = f.read()
+            except OSError as e:
+                print(f"Error reading file {file_path}: {e}")
+        if not content.isascii():
+            non_ascii[index] = content
+            content = b''
+        starts.append(offset)
+        parts.append(content)
+        parts.append(b'\n')
+        offset += len(content) + 1
+    return b''.join(parts), starts, non_ascii
+
+def count_sloc_batch(file_paths):
+    """Count SLOC for each file in the list. Returns a list of counts in the same order."""
+    import numpy as np
+
+    file_paths = list(file_paths)
+    if not file_paths:
+        return []
+    data, starts, non_ascii = read_batch(file_paths)
+    buf = np.frombuffer(data, dtype=np.uint8)
+
+    # A line ends at every \r or \n. The extra empty line inside a \r\n pair
+    # is blank, and blank lines neither count nor change the comment state.
+    # Per byte only boolean masks are built. Line endings and comment markers
+    # are kept as sparse index arrays, and the line of a position is the
+    # number of line endings before it.
+    is_eol = buf == ord('\n')
+    if b'\r' in data:
+        is_eol |= buf == ord('\r')
+    line_ends = np.flatnonzero(is_eol)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    num_lines = len(line_ends)
+
+    # Whitespace is the set str.strip() removes from ASCII text:
+    # \t-\r, \x1c-\x1f and space. The subtractions wrap around in uint8, so
+    # each range takes one comparison.
+    is_code = ~(((buf - ord('\t')) < 5) | ((buf - 0x1c) < 5))
+
+    # Comment markers, from the positions of '/'. The buffer always ends in
+    # a newline, so the byte after a '/' always exists.
+    slash_pos = np.flatnonzero(buf == ord('/'))
+    after_slash = buf[slash_pos + 1]
+    before_slash = buf[np.maximum(slash_pos - 1, 0)]
+    opens = after_slash == ord('*')
+    has_open = np.zeros(num_lines, dtype=bool)
+    has_open[np.searchsorted(line_ends, slash_pos[opens])] = True
+    has_close = np.zeros(num_lines, dtype=bool)
+    has_close[np.searchsorted(line_ends, slash_pos[before_slash == ord('*')])] = True
+
+    # The first // or /* marker of each line, or the line end if it has none
+    marker_pos = slash_pos[opens | (after_slash == ord('/'))]
+    marker_line = np.searchsorted(line_ends, marker_pos)
+    first = np.ones(len(marker_line), dtype=bool)
+    first[1:] = marker_line[1:] != marker_line[:-1]
+    has_marker = np.zeros(num_lines, dtype=bool)
+    has_marker[marker_line] = True
+    first_marker = line_ends.copy()
+    first_marker[marker_line[first]] = marker_pos[first]
+
+    # One reduceat over [line start, first marker) and [first marker, next
+    # line start) pairs finds the lines with code before their first marker.
+    # An empty pair gives the byte at its start instead of False, so those
+    # are masked out. A line is blank if it has neither code nor a marker,
+    # and starts with a comment if it has a marker but no code before it.
+    bounds = np.empty(2 * num_lines, dtype=line_ends.dtype)
+    bounds[0::2] = line_starts
+    bounds[1::2] = first_marker
+    code_before = np.logical_or.reduceat(is_code, bounds)[0::2] & (first_marker > line_starts)
+    nonblank = code_before | has_marker
+    starts_comment = has_marker & ~code_before
+
+    # Inside a block comment before a line means the last line with a marker
+    # above it, in the same file, opened a comment without closing one
+    line_index = np.arange(num_lines)
+    is_event = has_open | has_close
+    last_event = np.maximum.accumulate(np.where(is_event, line_index, -1))
+    event_before = np.concatenate(([-1], last_event[:-1]))
+    file_first_line = np.searchsorted(line_ends, np.asarray(starts))
+    file_of_line = np.searchsorted(file_first_line, line_index, side='right') - 1
+    opens_comment = has_open & ~has_close
+    in_comment = (event_before >= file_first_line[file_of_line]) & opens_comment[event_before]
+
+    counted = nonblank & ~has_open & ~has_close & ~starts_comment & ~in_comment
+    counts = np.bincount(file_of_line[counted], minlength=len(file_paths)).tolist()
+
+    if non_ascii:
+        from sloc_to_csv import count_sloc_in_buffer
+        for index, content in non_ascii.items():
+            counts[index] = count_sloc_in_buffer(content)
+    return counts
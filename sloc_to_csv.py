@@ -1,8 +1,15 @@
 import re
-import csv
 import sys
 import subprocess
 import os
+import argparse
+from itertools import islice
+
+from csv_stream import iter_file_list, count_written_rows, write_csv_rows, parse_flush_every
+from mapped_source import decode_source
+from sharding import add_shard_argument, filter_shard, shard_output_path
+from sloc_numpy import numpy_available, count_sloc_batch
+from walker import SolFileIndex, add_ignore_arguments, ignore_rules_from_args
 
 def parse_sloc_output(input_file=None):
     """
@@ -40,15 +47,7 @@ def parse_sloc_output(input_file=None):
 
 def read_file_list(csv_file):
     """Read the list of files from a CSV file."""
-    files = []
-    with open(csv_file, 'r') as f:
-        reader = csv.reader(f)
-        # Skip header
-        next(reader, None)
-        for row in reader:
-            if row and row[0]:  # Ensure row is not empty
-                files.append(row[0])
-    return files
+    return list(iter_file_list(csv_file))
 
 def count_sloc_for_file(file_path):
     """Count SLOC for a single file using the logic from sloc.py."""
@@ -56,105 +55,125 @@ def count_sloc_for_file(file_path):
         return 0
         
     try:
+        # Read line by line so large files are never held in memory
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-            in_multiline_comment = False
-            sloc = 0
-            
-            for line in lines:
-                line = line.strip()
-                if not line:  # Skip empty lines
-                    continue
-                    
-                # Handle multi-line comments
-                if '/*' in line:
-                    in_multiline_comment = True
-                if '*/' in line:
-                    in_multiline_comment = False
-                    continue
-                
-                # Skip comments and empty lines
-                if (not line.startswith('//') and 
-                    not in_multiline_comment and 
-                    not line.startswith('/*')):
-                    sloc += 1
-        
-        return sloc
+            return count_sloc_in_lines(f)
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
         return 0
 
-def count_sloc_for_files(files, search_dir='.'):
-    """Count SLOC for each file in the list."""
-    results = []
+def count_sloc_in_buffer(buf):
+    """Count SLOC in the bytes of a source file, decoded as count_sloc_for_file reads it."""
+    return count_sloc_in_lines(decode_source(buf).split('\n'))
+
+def count_sloc_in_lines(lines):
+    """Count SLOC in an iterable of decoded lines of text."""
+    in_multiline_comment = False
+    sloc = 0
     
-    for filename in files:
-        # Check if the filename has a prefix (contains underscore)
-        if '_' in filename:
-            prefix = filename.split('_')[0]
-            actual_filename = filename[len(prefix)+1:]  # +1 for the underscore
-            
-            # Look for the file in the directory with the prefix
-            prefix_dir = os.path.join(search_dir, prefix)
-            if os.path.exists(prefix_dir):
-                found = False
-                for root, _, filenames in os.walk(prefix_dir):
-                    if actual_filename in filenames:
-                        file_path = os.path.join(root, actual_filename)
-                        # Use our internal SLOC counting function instead of external command
-                        sloc_count = count_sloc_for_file(file_path)
-                        results.append((file_path, filename, sloc_count))
-                        found = True
-                        break
-                
-                if not found:
-                    results.append(("Not found", filename, 0))
-        else:
-            # For files without prefix, search in all directories
-            found = False
-            for root, _, filenames in os.walk(search_dir):
-                if filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    # Use our internal SLOC counting function instead of external command
-                    sloc_count = count_sloc_for_file(file_path)
-                    results.append((file_path, filename, sloc_count))
-                    found = True
-                    break
+    for line in lines:
+        line = line.strip()
+        if not line:  # Skip empty lines
+            continue
             
-            # If file not found, record it with 0 SLOC
-            if not found:
-                results.append(("Not found", filename, 0))
+        # Handle multi-line comments
+        if '/*' in line:
+            in_multiline_comment = True
+        if '*/' in line:
+            in_multiline_comment = False
+            continue
+        
+        # Skip comments and empty lines
+        if (not line.startswith('//') and 
+            not in_multiline_comment and 
+            not line.startswith('/*')):
+            sloc += 1
     
-    return results
+    return sloc
+
+def iter_resolved_files(files, search_dir='.', ignore=None):
+    """Yield (file_path, filename) for each file in the list, with "Not found" for missing ones."""
+    index = None
+    
+    for filename in files:
+        # Index the search directory with one pruned walk, on first use
+        if index is None:
+            index = SolFileIndex(search_dir, ignore)
+        
+        file_path = index.resolve(filename)
+        # If file not found, it is recorded with 0 SLOC
+        yield (file_path or "Not found", filename)
+
+def iter_sloc_for_files(files, search_dir='.', ignore=None, backend='python', batch_size=1000):
+    """
+    Yield a (file_path, filename, sloc) result for each file in the list.
+    The numpy backend counts batch_size files at a time with sloc_numpy,
+    and falls back to the Python backend if NumPy is not installed.
+    """
+    resolved = iter_resolved_files(files, search_dir, ignore)
+    
+    if backend == 'numpy' and not numpy_available():
+        print("Warning: NumPy is not installed, using the python backend")
+        backend = 'python'
+    
+    if backend == 'numpy':
+        while True:
+            batch = list(islice(resolved, batch_size))
+            if not batch:
+                return
+            paths = [file_path for file_path, _ in batch if file_path != "Not found"]
+            counts = iter(count_sloc_batch(paths))
+            for file_path, filename in batch:
+                yield (file_path, filename, next(counts) if file_path != "Not found" else 0)
+    
+    for file_path, filename in resolved:
+        if file_path == "Not found":
+            yield (file_path, filename, 0)
+        else:
+            # Use our internal SLOC counting function instead of external command
+            yield (file_path, filename, count_sloc_for_file(file_path))
+
+def count_sloc_for_files(files, search_dir='.', ignore=None, backend='python'):
+    """Count SLOC for each file in the list."""
+    return list(iter_sloc_for_files(files, search_dir, ignore, backend))
 
-def write_csv(results, output_file='sloc_count.csv'):
-    """Write the parsed results to a CSV file."""
-    with open(output_file, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['Filename', 'SLOC'])  # Updated header
-        for result in results:
-            writer.writerow([result[1], result[2]])  # Only write filename and SLOC
+def write_csv(results, output_file='sloc_count.csv', flush_every=100, resume=False):
+    """Write the parsed results to a CSV file as they are produced."""
+    rows = ([result[1], result[2]] for result in results)  # Only write filename and SLOC
+    write_csv_rows(rows, output_file, ['Filename', 'SLOC'], flush_every, resume)
     
     print(f"Results written to {output_file}")
 
 def main():
-    # Check command line arguments
-    if len(sys.argv) < 2:
-        print("Usage: python sloc_to_csv.py <file_list.csv> [output_file.csv] [search_directory]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Count SLOC for a list of files and write the results to CSV.")
+    parser.add_argument('file_list_csv', help="CSV file with the filenames to process (first column)")
+    parser.add_argument('output_file', nargs='?', default=None, help="Output CSV file (default: sloc_count.csv, or a per-shard name with --shard)")
+    parser.add_argument('search_dir', nargs='?', default='.', help="Directory to search for files (default: .)")
+    parser.add_argument('--resume', action='store_true', help="Continue from the last row already written to the output file")
+    parser.add_argument('--flush-every', type=parse_flush_every, default=100, help="Flush the output file every N rows (default: 100)")
+    parser.add_argument('--backend', choices=['python', 'numpy'], default='python', help="Count lines one file at a time in Python, or in batches with NumPy (default: python)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Files per batch with --backend numpy (default: 1000)")
+    add_shard_argument(parser)
+    add_ignore_arguments(parser)
+    args = parser.parse_args()
     
-    file_list_csv = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else 'sloc_count.csv'
-    search_dir = sys.argv[3] if len(sys.argv) > 3 else '.'
+    if args.output_file is None:
+        args.output_file = shard_output_path('sloc_count.csv', args.shard)
     
-    # Read the list of files from the CSV
-    files = read_file_list(file_list_csv)
+    # Stream this shard's part of the file list, skipping rows a previous run already wrote
+    files = filter_shard(iter_file_list(args.file_list_csv), args.shard)
+    if args.resume:
+        done = count_written_rows(args.output_file)
+        if done:
+            print(f"Resuming after {done} rows already in {args.output_file}")
+        files = islice(files, done, None)
     
     # Count SLOC for each file
-    results = count_sloc_for_files(files, search_dir)
+    results = iter_sloc_for_files(files, args.search_dir, ignore_rules_from_args(args),
+                                  args.backend, args.batch_size)
     
     # Write results to CSV
-    write_csv(results, output_file)
+    write_csv(results, args.output_file, args.flush_every, args.resume)
 
 if __name__ == "__main__":
     main()
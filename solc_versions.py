@@ -0,0 +1,272 @@
+import os
+import re
+import json
+import argparse
+
+from diffcheck import COMMENT_BYTES_RE
+from mapped_source import map_file
+
+# Where solc-select keeps its binaries, e.g. ~/.solc-select/artifacts/solc-0.8.19/solc-0.8.19
+DEFAULT_SOLC_DIR = os.path.join("~", ".solc-select", "artifacts")
+DEFAULT_CACHE_FILE = "solc_versions.json"
+
+# --via-ir is only supported without the experimental flag from this version on
+VIA_IR_MIN_VERSION = (0, 8, 13)
+
+PRAGMA_RE = re.compile(rb'pragma\s+solidity\s+([^;]+);')
+IMPORT_RE = re.compile(rb'import\s+(?:[^;"\']*?\s+from\s+)?["\']([^"\']+)["\']')
+COMPILER_NAME_RE = re.compile(r'solc-(?:\w+-)*v?(\d+\.\d+\.\d+)(?:\+[\w.]+)?(?:\.exe)?$')
+RANGE_RE = re.compile(r'(\S+)\s+-\s+(\S+)')
+COMPARATOR_RE = re.compile(r'(\^|~|>=|<=|>|<|=)?\s*v?([0-9xX*]+(?:\.[0-9xX*]+)*)')
+
+def project_remaps(base_path):
+    """The import remappings of a project, as (prefix, target) pairs."""
+    return [
+        ("@openzeppelin", f"./{base_path}/@openzeppelin"),
+        ("@chainlink", f"./{base_path}/@chainlink"),
+    ]
+
+def format_remaps(base_path):
+    """The remappings of a project as a slither --solc-remaps value."""
+    return " ".join(f"{prefix}={target}" for prefix, target in project_remaps(base_path))
+
+def solc_args(version=None):
+    """The compiler arguments for slither, dropping --via-ir for versions that lack it."""
+    if version is not None and parse_version(version) < VIA_IR_MIN_VERSION:
+        return "--optimize --optimize-runs 200"
+    return "--via-ir --optimize --optimize-runs 200"
+
+def parse_version(version):
+    """Parse 'X.Y.Z' into a tuple of ints."""
+    return tuple(int(part) for part in version.split('.'))
+
+def _bounds(op, parts):
+    """
+    Turn one comparator into a half-open interval [low, high) of versions.
+    Missing or wildcard components (0.8, 0.8.x) match any value.
+    """
+    if not parts:  # '*' matches every version
+        return (0, 0, 0), None
+
+    low = tuple(parts) + (0,) * (3 - len(parts))
+    # The first version past everything the given components match
+    after = tuple(parts[:-1]) + (parts[-1] + 1,) + (0,) * (3 - len(parts))
+
+    if op == '>=':
+        return low, None
+    if op == '>':
+        return after, None
+    if op == '<':
+        return (0, 0, 0), low
+    if op == '<=':
+        return (0, 0, 0), after
+    if op == '^':
+        # Same major version, or the same minor version while the major is 0
+        for i, part in enumerate(parts):
+            if part != 0 or i == len(parts) - 1:
+                return low, tuple(parts[:i]) + (part + 1,) + (0,) * (2 - i)
+    if op == '~':
+        if len(parts) >= 2:
+            return low, (parts[0], parts[1] + 1, 0)
+        return low, after
+    return low, after  # '=' or no operator
+
+def _parse_parts(version):
+    """Parse a possibly partial version into its leading numeric components."""
+    parts = []
+    for part in version.split('.'):
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+    return parts
+
+def parse_constraint(text):
+    """
+    Parse a pragma solidity expression (^, ~, comparisons, a - b ranges and
+    ||) into a list of alternatives, each a list of (low, high) intervals
+    that must all hold.
+    """
+    alternatives = []
+    for alternative in text.split('||'):
+        intervals = []
+        for start, end in RANGE_RE.findall(alternative):
+            intervals.append((_bounds('>=', _parse_parts(start))[0], _bounds('<=', _parse_parts(end))[1]))
+        for op, version in COMPARATOR_RE.findall(RANGE_RE.sub('', alternative)):
+            intervals.append(_bounds(op, _parse_parts(version)))
+        alternatives.append(intervals)
+    return alternatives
+
+def satisfies(version, constraint):
+    """True if a version tuple satisfies a parsed constraint."""
+    for intervals in constraint:
+        if all(low <= version and (high is None or version < high) for low, high in intervals):
+            return True
+    return False
+
+def find_compilers(solc_dir=None):
+    """
+    Map each solc version found under solc_dir to its binary. Binaries may
+    sit directly in the directory or one level down, as solc-select stores
+    them, and are named like solc-0.8.19 or solc-linux-amd64-v0.8.19+commit.7dd6d404.
+    """
+    solc_dir = os.path.expanduser(solc_dir or os.environ.get("SOLC_DIR") or DEFAULT_SOLC_DIR)
+    compilers = {}
+    if not os.path.isdir(solc_dir):
+        return compilers
+
+    candidates = []
+    for entry in os.scandir(solc_dir):
+        if entry.is_dir():
+            candidates.extend(os.scandir(entry.path))
+        else:
+            candidates.append(entry)
+
+    for entry in candidates:
+        match = COMPILER_NAME_RE.match(entry.name)
+        if match and entry.is_file() and os.access(entry.path, os.X_OK):
+            compilers.setdefault(match.group(1), entry.path)
+    return compilers
+
+def read_pragmas_and_imports(file_path):
+    """Return the pragma solidity expressions and import paths of a source file."""
+    with map_file(file_path) as buf:
+        code = COMMENT_BYTES_RE.sub(b'', buf)
+    pragmas = [pragma.decode('utf-8', errors='ignore').strip() for pragma in PRAGMA_RE.findall(code)]
+    imports = [path.decode('utf-8', errors='ignore') for path in IMPORT_RE.findall(code)]
+    return pragmas, imports
+
+def resolve_import(import_path, importing_file, base_path):
+    """Find the file an import refers to, or None."""
+    if import_path.startswith('.'):
+        candidates = [os.path.join(os.path.dirname(importing_file), import_path)]
+    else:
+        candidates = [
+            target + import_path[len(prefix):]
+            for prefix, target in project_remaps(base_path) if import_path.startswith(prefix)
+        ]
+        candidates += [os.path.join(base_path, import_path), import_path]
+
+    for candidate in candidates:
+        candidate = os.path.normpath(candidate)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def import_closure(sol_file_path):
+    """
+    Return {path: [pragma, ...]} for a file and every file it imports,
+    directly or indirectly.
+    """
+    base_path = sol_file_path.split('/')[0]
+    pragmas_by_file = {}
+    stack = [os.path.normpath(sol_file_path)]
+    while stack:
+        file_path = stack.pop()
+        if file_path in pragmas_by_file:
+            continue
+        pragmas, imports = read_pragmas_and_imports(file_path)
+        pragmas_by_file[file_path] = pragmas
+        for import_path in imports:
+            resolved = resolve_import(import_path, file_path, base_path)
+            if resolved and resolved not in pragmas_by_file:
+                stack.append(resolved)
+    return pragmas_by_file
+
+class SolcResolver:
+    """
+    Picks the newest local solc binary that satisfies the pragmas of a
+    target and everything it imports. The pragmas of each target are cached
+    per project, keyed by the modification times of the files they came
+    from, so unchanged projects are not parsed again.
+    """
+
+    def __init__(self, solc_dir=None, cache_file=DEFAULT_CACHE_FILE):
+        self.compilers = find_compilers(solc_dir)
+        self.versions = sorted(self.compilers, key=parse_version, reverse=True)
+        self.cache_file = cache_file
+        self.cache = {}
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, 'r') as f:
+                self.cache = json.load(f)
+
+    def target_pragmas(self, sol_file_path):
+        """The pragma expressions that apply to a target, from the cache when still valid."""
+        project = self.cache.setdefault(sol_file_path.split('/')[0], {})
+        entry = project.get(sol_file_path)
+        if entry and all(os.path.exists(path) and os.stat(path).st_mtime_ns == mtime
+                         for path, mtime in entry["files"].items()):
+            return entry["pragmas"]
+
+        pragmas_by_file = import_closure(sol_file_path)
+        pragmas = sorted({pragma for file_pragmas in pragmas_by_file.values() for pragma in file_pragmas})
+        project[sol_file_path] = {
+            "files": {path: os.stat(path).st_mtime_ns for path in pragmas_by_file},
+            "pragmas": pragmas,
+        }
+        return pragmas
+
+    def resolve(self, sol_file_path):
+        """Return (version, binary) for a target, or (None, None) if no local compiler matches."""
+        try:
+            constraints = [parse_constraint(pragma) for pragma in self.target_pragmas(sol_file_path)]
+        except OSError as e:
+            print(f"Error reading {sol_file_path}: {e}")
+            return None, None
+
+        for version in self.versions:
+            if all(satisfies(parse_version(version), constraint) for constraint in constraints):
+                return version, self.compilers[version]
+        return None, None
+
+    def save(self):
+        """Write the pragma cache back to disk."""
+        if self.cache_file:
+            with open(self.cache_file, 'w') as f:
+                json.dump(self.cache, f, indent=1, sort_keys=True)
+
+def resolve_targets(sol_files, resolver):
+    """
+    Resolve the compiler of every target and print how many use each
+    version. Returns {target: (version, binary)}.
+    """
+    if not resolver.compilers:
+        print("No local solc binaries found, using the solc on PATH for every target")
+        return {sol_file_path: (None, None) for sol_file_path in sol_files}
+
+    resolutions = {sol_file_path: resolver.resolve(sol_file_path) for sol_file_path in sol_files}
+    resolver.save()
+
+    by_version = {}
+    for sol_file_path, (version, _) in resolutions.items():
+        by_version.setdefault(version, []).append(sol_file_path)
+    for version in sorted((v for v in by_version if v), key=parse_version):
+        print(f"solc {version}: {len(by_version[version])} targets")
+    for sol_file_path in by_version.get(None, []):
+        print(f"Warning: no local solc matches {sol_file_path}, using the solc on PATH")
+    return resolutions
+
+def add_solc_arguments(parser):
+    """Add the shared --solc-dir and --solc-cache options to an argparse parser."""
+    parser.add_argument('--solc-dir', default=None,
+                        help=f"Directory of solc binaries (default: $SOLC_DIR or {DEFAULT_SOLC_DIR})")
+    parser.add_argument('--solc-cache', default=DEFAULT_CACHE_FILE,
+                        help=f"Cache of each target's pragmas (default: {DEFAULT_CACHE_FILE})")
+
+def solc_resolver_from_args(args):
+    """Build a SolcResolver from the options added by add_solc_arguments."""
+    return SolcResolver(args.solc_dir, args.solc_cache)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick a local solc binary for each Solidity target from its pragmas.")
+    parser.add_argument('targets', nargs='+', help="Solidity files to resolve")
+    add_solc_arguments(parser)
+    args = parser.parse_args()
+
+    resolutions = resolve_targets(args.targets, solc_resolver_from_args(args))
+    for sol_file_path, (version, binary) in resolutions.items():
+        print(f"{sol_file_path}: {version or 'no match'} {binary or ''}".rstrip())
+
+if __name__ == "__main__":
+    main()
+
+#sample command : python3 solc_versions.py Comet/contracts/Comet.sol --solc-dir ~/.solc-select/artifacts
@@ -2,8 +2,15 @@ import os
 import hashlib
 import shutil
 import csv
+import argparse
+from array import array
 from collections import defaultdict
 
+from csv_stream import write_csv_rows
+from mapped_source import map_file, is_ascii, decode_source, update_hash_with_code
+from sharding import add_shard_argument, in_shard, shard_output_path
+from walker import iter_sol_files, add_ignore_arguments, ignore_rules_from_args
+
 def get_file_hash(file_path):
     """Calculate MD5 hash of a file to check if files are identical."""
     # For .sol files, we'll remove comments before hashing
@@ -19,111 +26,223 @@ def get_file_hash(file_path):
 
 def get_solidity_file_hash_without_comments(file_path):
     """Calculate MD5 hash of a Solidity file after removing comments."""
-    hash_md5 = hashlib.md5()
+    # Hash the mapped bytes directly, skipping single-line (// ...) and
+    # multi-line (/* ... */) comments without building stripped copies
+    with map_file(file_path) as buf:
+        return get_solidity_source_hash(buf)
+
+def get_solidity_source_hash(buf):
+    """Calculate MD5 hash of Solidity source bytes after removing comments."""
+    if not is_ascii(buf):
+        # Drop undecodable bytes first, as hashing the decoded text always did
+        buf = decode_source(buf).encode('utf-8')
     
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        content = f.read()
-        
-    # Remove single-line comments (// ...)
-    content_no_single_comments = ""
-    i = 0
-    while i < len(content):
-        if content[i:i+2] == "//":
-            # Skip until end of line
-            while i < len(content) and content[i] != '\n':
-                i += 1
-        else:
-            content_no_single_comments += content[i]
-            i += 1
-    
-    # Remove multi-line comments (/* ... */)
-    content_no_comments = ""
-    i = 0
-    while i < len(content_no_single_comments):
-        if content_no_single_comments[i:i+2] == "/*":
-            # Skip until end of comment
-            i += 2
-            while i < len(content_no_single_comments) and content_no_single_comments[i-2:i] != "*/":
-                i += 1
-        else:
-            content_no_comments += content_no_single_comments[i]
-            i += 1
-    
-    # Hash the content without comments
-    hash_md5.update(content_no_comments.encode('utf-8'))
+    hash_md5 = hashlib.md5()
+    update_hash_with_code(hash_md5, buf)
     return hash_md5.hexdigest()
 
-def find_and_rename_duplicate_files(root_dir, csv_output=None):
+def iter_candidate_files(root_dir, ignore=None):
     """
-    Find files with the same name in different directories and create a report
-    of what would be renamed, without actually renaming the files.
+    Yield an os.DirEntry for every .sol file under root_dir that the report
+    covers, in walk order. Ignored directories such as crytic-export and
+    node_modules are pruned before descending into them.
+    """
+    for entry in iter_sol_files(root_dir, ignore):
+        # Additional filter to exclude files with "crytic-export" in their name
+        if not entry.name.startswith('crytic-export_'):
+            yield entry
+
+def group_files_by_hash(file_paths, hash_func=get_file_hash):
+    """Group files by their hash to identify truly identical files."""
+    files_by_hash = defaultdict(list)
+    for file_path in file_paths:
+        file_hash = hash_func(file_path)
+        files_by_hash[file_hash].append(file_path)
+    return files_by_hash
+
+class FileRecord:
     """
-    # Dictionary to store file names and their paths
-    files_by_name = defaultdict(list)
+    A read-only view of one row of a FileTable. Fields are attributes, and
+    record["new_filename"] style access still works for code written
+    against the old per-file dicts.
+    """
+    __slots__ = ("_table", "_index")
     
-    # Walk through all directories and subdirectories
-    for dirpath, dirnames, filenames in os.walk(root_dir, topdown=True):
-        # Skip the cryptic-export directory by modifying dirnames in-place
-        
-        for filename in filenames:
-            # Only process .sol files
-            if not filename.endswith('.sol'):
-                continue
-                
-                
-            full_path = os.path.join(dirpath, filename)
-            files_by_name[filename].append(full_path)
-    
-    # Process all files
-    all_files = []
-    unique_files = set()  # Track unique filenames to display
-    
-    # Additional filter to exclude files with "crytic-export" in their name
-    filtered_files_by_name = {}
-    for filename, paths in files_by_name.items():
-        if not filename.startswith('crytic-export_'):
-            filtered_files_by_name[filename] = paths
-    
-    # Use the filtered dictionary for processing
-    for filename, file_paths in filtered_files_by_name.items():
-        # Group files by their hash to identify truly identical files
-        files_by_hash = defaultdict(list)
-        for file_path in file_paths:
-            file_hash = get_file_hash(file_path)
-            files_by_hash[file_hash].append(file_path)
+    FIELDS = ("original_filename", "directory", "new_filename", "full_path", "new_path")
+    
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+    
+    @property
+    def original_filename(self):
+        return self._table.names[self._table.name_ids[self._index]]
+    
+    @property
+    def directory(self):
+        table = self._table
+        top_dir = table.top_dirs[table.dir_ids[self._index]]
+        # Files directly in the root have no directory, so relpath gives the filename
+        return self.original_filename if top_dir is None else top_dir
+    
+    @property
+    def new_filename(self):
+        return self._table.names[self._table.new_name_ids[self._index]]
+    
+    @property
+    def full_path(self):
+        return os.path.join(self._table.dirs[self._table.dir_ids[self._index]], self.original_filename)
+    
+    @property
+    def new_path(self):
+        return os.path.join(self._table.dirs[self._table.dir_ids[self._index]], self.new_filename)
+    
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def keys(self):
+        return self.FIELDS
+    
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+    
+    def __repr__(self):
+        return f"FileRecord({self.as_dict()!r})"
+
+class FileTable:
+    """
+    The rename plan for a scan, stored compactly: every directory and name
+    is kept once in an intern table, and each file is three integers in
+    parallel arrays (its directory, its name and its new name). Iterating
+    yields FileRecord views built on demand.
+    """
+    
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.dirs = []
+        self.top_dirs = []  # First component of each directory below root_dir, None for root_dir itself
+        self.names = []
+        self._dir_ids = {}
+        self._name_ids = {}
+        self.dir_ids = array('I')
+        self.name_ids = array('I')
+        self.new_name_ids = array('I')
+    
+    def intern_dir(self, dir_path):
+        """Return the index of a directory, adding it on first use."""
+        dir_id = self._dir_ids.get(dir_path)
+        if dir_id is None:
+            dir_id = self._dir_ids[dir_path] = len(self.dirs)
+            self.dirs.append(dir_path)
+            rel_dir = os.path.relpath(dir_path, self.root_dir)
+            self.top_dirs.append(None if rel_dir == os.curdir else rel_dir.split(os.sep)[0])
+        return dir_id
+    
+    def intern_name(self, name):
+        """Return the index of a file name, adding it on first use."""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+    
+    def top_dir(self, file_path):
+        """The top-level directory of a file under root_dir, used as its rename prefix."""
+        top_dir = self.top_dirs[self.intern_dir(os.path.dirname(file_path))]
+        return os.path.basename(file_path) if top_dir is None else top_dir
+    
+    def add_files(self, filename, files_by_hash):
+        """
+        Decide the new name of every file called `filename`, given its files
+        grouped by hash, and append them to the table.
+        """
+        name_id = self.intern_name(filename)
         
         # Process each set of identical files (same hash)
         for file_hash, identical_files in files_by_hash.items():
-            # If there's only one set of identical files with this name
+            # If there's only one set of identical files with this name, keep
+            # the original name for all of them
             if len(files_by_hash) == 1:
-                # Keep original name for all files in this set
-                unique_files.add(filename)
-                for file_path in identical_files:
-                    all_files.append({
-                        "original_filename": filename,
-                        "directory": os.path.relpath(file_path, root_dir).split(os.sep)[0],
-                        "new_filename": filename,
-                        "full_path": file_path,
-                        "new_path": file_path
-                    })
+                new_name_id = name_id
             else:
                 # Multiple sets with different content - rename each set
                 # For each set of identical files, use the first file's directory as prefix
-                first_file = identical_files[0]
-                top_dir = os.path.relpath(first_file, root_dir).split(os.sep)[0]
-                new_filename = f"{top_dir}_{filename}"
-                unique_files.add(new_filename)
-                
-                for file_path in identical_files:
-                    new_path = os.path.join(os.path.dirname(file_path), new_filename)
-                    all_files.append({
-                        "original_filename": filename,
-                        "directory": os.path.relpath(file_path, root_dir).split(os.sep)[0],
-                        "new_filename": new_filename,
-                        "full_path": file_path,
-                        "new_path": new_path
-                    })
+                new_name_id = self.intern_name(f"{self.top_dir(identical_files[0])}_{filename}")
+            
+            for file_path in identical_files:
+                self.dir_ids.append(self.intern_dir(os.path.dirname(file_path)))
+                self.name_ids.append(name_id)
+                self.new_name_ids.append(new_name_id)
+    
+    def unique_filenames(self):
+        """The set of file names after renaming."""
+        return {self.names[name_id] for name_id in set(self.new_name_ids)}
     
+    def __len__(self):
+        return len(self.dir_ids)
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("FileTable index out of range")
+        return FileRecord(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield FileRecord(self, index)
+
+def index_files_by_name(table, ignore=None):
+    """
+    Map each .sol filename under the table's root to the directories that
+    have it, in walk order, stored as indices into the table's directory
+    list instead of full path strings.
+    """
+    dir_ids_by_name = {}
+    for entry in iter_candidate_files(table.root_dir, ignore):
+        dir_ids = dir_ids_by_name.get(entry.name)
+        if dir_ids is None:
+            dir_ids = dir_ids_by_name[table.names[table.intern_name(entry.name)]] = array('I')
+        dir_ids.append(table.intern_dir(os.path.dirname(entry.path)))
+    return dir_ids_by_name
+
+def plan_renames(root_dir, filename, files_by_hash):
+    """
+    Decide the new name of every file called `filename`, given its files
+    grouped by hash. Returns one record dict per file.
+    """
+    table = FileTable(root_dir)
+    table.add_files(filename, files_by_hash)
+    return [record.as_dict() for record in table]
+
+def write_unique_files_csv(unique_files, csv_output):
+    """Write the sorted list of unique filenames to a CSV file."""
+    with open(csv_output, 'w', newline='') as csvfile:
+        csv_writer = csv.writer(csvfile)
+        csv_writer.writerow(["Unique Filename"])  # Header
+        for filename in sorted(unique_files):
+            csv_writer.writerow([filename])
+
+def find_and_rename_duplicate_files(root_dir, csv_output=None, ignore=None):
+    """
+    Find files with the same name in different directories and create a report
+    of what would be renamed, without actually renaming the files.
+    Returns a FileTable, which yields one FileRecord per file.
+    """
+    table = FileTable(root_dir)
+    
+    # Only one filename's paths are built at a time, to hash them
+    for filename, dir_ids in index_files_by_name(table, ignore).items():
+        file_paths = (os.path.join(table.dirs[dir_id], filename) for dir_id in dir_ids)
+        table.add_files(filename, group_files_by_hash(file_paths))
+    
+    report_unique_files(table.unique_filenames(), csv_output)
+    return table
+
+def report_unique_files(unique_files, csv_output=None):
+    """Print the unique filenames and optionally save them to a CSV file."""
     # Print just the list of unique filenames
     print("\nList of unique files:")
     print("-" * 40)
@@ -133,29 +252,76 @@ def find_and_rename_duplicate_files(root_dir, csv_output=None):
     
     # Save to CSV if requested - now only saving the unique filenames
     if csv_output:
-        with open(csv_output, 'w', newline='') as csvfile:
-            csv_writer = csv.writer(csvfile)
-            csv_writer.writerow(["Unique Filename"])  # Header
-            for filename in sorted(unique_files):
-                csv_writer.writerow([filename])
+        write_unique_files_csv(unique_files, csv_output)
         print(f"List of unique files saved to {csv_output}")
+
+def write_hash_manifest(root_dir, manifest_output, shard=None, ignore=None):
+    """
+    Hash this shard's .sol files and write them to a manifest CSV instead of
+    deciding renames, which needs the files of every shard. Each row keeps
+    the file's position among the files sharing its name so the merge can
+    reproduce the walk order.
+    """
+    def rows():
+        table = FileTable(root_dir)
+        for filename, dir_ids in index_files_by_name(table, ignore).items():
+            for index, dir_id in enumerate(dir_ids):
+                file_path = os.path.join(table.dirs[dir_id], filename)
+                rel_path = os.path.relpath(file_path, root_dir)
+                if in_shard(rel_path, shard):
+                    yield [filename, index, get_file_hash(file_path), rel_path]
     
-    return all_files
+    count = write_csv_rows(rows(), manifest_output, ["Filename", "Index", "Hash", "Path"])
+    print(f"Hashed {count} files into {manifest_output}")
 
-if __name__ == "__main__":
-    import sys
+def merge_hash_manifests(root_dir, manifests, csv_output=None):
+    """
+    Combine the hash manifests of all shards and decide renames as if the
+    whole directory had been scanned in one run.
+    """
+    entries = defaultdict(list)
+    for manifest in manifests:
+        with open(manifest, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip header
+            for filename, index, file_hash, rel_path in reader:
+                entries[filename].append((int(index), file_hash, rel_path))
     
-    if len(sys.argv) > 1:
-        directory = sys.argv[1]
-        # Extract the directory name if it's in the format "./directory_name"
-        if directory.startswith('./'):
-            directory = directory[2:]
-    else:
-        directory = "."  # Default to current directory
+    table = FileTable(root_dir)
+    for filename, items in entries.items():
+        files_by_hash = defaultdict(list)
+        for _, file_hash, rel_path in sorted(items):
+            files_by_hash[file_hash].append(os.path.join(root_dir, rel_path))
+        table.add_files(filename, files_by_hash)
+    
+    report_unique_files(table.unique_filenames(), csv_output)
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Find Solidity files that share a name and report unique filenames.")
+    parser.add_argument('directory', nargs='?', default='.', help="Directory to scan (default: .)")
+    parser.add_argument('--output', default="duplicate_files_report.csv", help="CSV report of unique filenames (default: duplicate_files_report.csv)")
+    add_shard_argument(parser)
+    add_ignore_arguments(parser)
+    parser.add_argument('--merge', nargs='+', metavar='MANIFEST', help="Merge the hash manifests written by --shard runs into the report")
+    args = parser.parse_args()
+    
+    directory = args.directory
+    # Extract the directory name if it's in the format "./directory_name"
+    if directory.startswith('./'):
+        directory = directory[2:]
     
-    # Default CSV output filename
-    csv_output = "duplicate_files_report.csv"
+    ignore = ignore_rules_from_args(args)
     
-    print(f"Scanning directory: {os.path.abspath(directory)}")
-    find_and_rename_duplicate_files(directory, csv_output)
+    if args.merge:
+        merge_hash_manifests(directory, args.merge, args.output)
+    elif args.shard:
+        print(f"Scanning directory: {os.path.abspath(directory)}")
+        write_hash_manifest(directory, shard_output_path("hash_manifest.csv", args.shard), args.shard, ignore)
+    else:
+        print(f"Scanning directory: {os.path.abspath(directory)}")
+        find_and_rename_duplicate_files(directory, args.output, ignore)
     print("Done!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import os
+import re
+
+# Directories that hold dependencies or build output rather than audited code
+DEFAULT_IGNORES = [
+    ".git/",
+    "node_modules/",
+    "crytic-export/",
+    "out/",
+    "cache/",
+    "artifacts/",
+    "**/lib/forge-std/",
+]
+
+def _translate(pattern):
+    """Translate one gitignore-style glob into a regex over '/'-separated paths."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+class IgnoreRules:
+    """
+    A compiled set of gitignore-style patterns.
+    Patterns without a '/' match a file or directory name at any depth,
+    patterns containing a '/' match the path relative to the walk root, and
+    a trailing '/' restricts a pattern to directories. Negation ('!') is not
+    supported.
+    """
+
+    def __init__(self, patterns=DEFAULT_IGNORES):
+        rules = {(False, False): [], (False, True): [], (True, False): [], (True, True): []}
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#") or pattern.startswith("!"):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            rules[(anchored, dir_only)].append(_translate(pattern.lstrip("/")))
+
+        # One alternation per kind of rule, so each entry costs at most four matches
+        self._rules = {
+            key: re.compile("(?:" + "|".join(regexes) + r")\Z")
+            for key, regexes in rules.items() if regexes
+        }
+
+    def ignores(self, rel_path, name, is_dir):
+        """True if the entry at rel_path (relative to the walk root) should be skipped."""
+        for (anchored, dir_only), regex in self._rules.items():
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path if anchored else name):
+                return True
+        return False
+
+def load_ignore_file(file_path):
+    """Read gitignore-style patterns from a file, one per line."""
+    with open(file_path, "r") as f:
+        return [line.rstrip("\n") for line in f]
+
+def iter_sol_files(root_dir, ignore=None, suffix=".sol"):
+    """
+    Yield an os.DirEntry for every file under root_dir ending in suffix, in
+    the same order as os.walk, without descending into ignored directories.
+    The entries carry their paths and cache their stat() results.
+    """
+    rules = IgnoreRules() if ignore is None else ignore
+    stack = [(root_dir, "")]
+
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            scanner = os.scandir(dir_path)
+        except OSError:
+            continue
+
+        subdirs = []
+        with scanner:
+            for entry in scanner:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    # Like os.walk, symlinked directories are listed but not followed
+                    if not entry.is_symlink() and not rules.ignores(rel_path, entry.name, True):
+                        subdirs.append((entry.path, rel_path))
+                elif entry.name.endswith(suffix) and not rules.ignores(rel_path, entry.name, False):
+                    yield entry
+
+        # Visit subdirectories in listing order after this directory's files
+        stack.extend(reversed(subdirs))
+
+def ignore_rules_from_args(args):
+    """Build IgnoreRules from the options added by add_ignore_arguments."""
+    patterns = [] if args.no_default_ignores else list(DEFAULT_IGNORES)
+    for ignore_file in args.ignore_file or []:
+        patterns.extend(load_ignore_file(ignore_file))
+    patterns.extend(args.ignore or [])
+    return IgnoreRules(patterns)
+
+def add_ignore_arguments(parser):
+    """Add the shared --ignore, --ignore-file and --no-default-ignores options to an argparse parser."""
+    parser.add_argument('--ignore', action='append', metavar='GLOB',
+                        help="gitignore-style pattern of paths to skip (repeatable)")
+    parser.add_argument('--ignore-file', action='append', metavar='FILE',
+                        help="File of gitignore-style patterns to skip (repeatable)")
+    parser.add_argument('--no-default-ignores', action='store_true',
+                        help="Also walk " + ", ".join(DEFAULT_IGNORES))
+
+class SolFileIndex:
+    """
+    The first path of every .sol filename under a directory, built from one
+    pruned walk (or from given paths, in walk order), for resolving entries
+    of a unique-file list. As in unique_files.FileTable, each directory is
+    kept once in an intern table and the lookups map names to directory
+    indices, so no full path is stored per file.
+    """
+
+    def __init__(self, root_dir, ignore=None, paths=None):
+        self.root_dir = root_dir
+        self.dirs = []
+        self.top_dirs = []  # First component of each directory below root_dir, None for root_dir itself
+        self._dir_ids = {}
+        self.by_name = {}  # Name -> index of the directory of its first file
+        self.by_top_dir = {}  # Top-level directory -> {name: index of the directory of its first file}
+        if paths is None:
+            paths = (entry.path for entry in iter_sol_files(root_dir, ignore))
+        for path in paths:
+            self.add(path)
+
+    def add(self, path):
+        """Index a file, unless files with its name were indexed before."""
+        dir_path, name = os.path.split(path)
+        dir_id = self.intern_dir(dir_path)
+        self.by_name.setdefault(name, dir_id)
+        top_dir = self.top_dirs[dir_id]
+        if top_dir is not None:
+            self.by_top_dir.setdefault(top_dir, {}).setdefault(name, dir_id)
+
+    def intern_dir(self, dir_path):
+        """Return the index of a directory, adding it on first use."""
+        dir_id = self._dir_ids.get(dir_path)
+        if dir_id is None:
+            dir_id = self._dir_ids[dir_path] = len(self.dirs)
+            self.dirs.append(dir_path)
+            rel_dir = os.path.relpath(dir_path, self.root_dir)
+            self.top_dirs.append(None if rel_dir == os.curdir else rel_dir.split(os.sep)[0])
+        return dir_id
+
+    def resolve(self, filename):
+        """
+        Return the path for a filename from a unique-file list, or None.
+        A prefixed name like dir_file.sol is looked up as file.sol under the
+        top-level directory dir; other names are looked up anywhere.
+        """
+        # Check if the filename has a prefix (contains underscore)
+        if '_' in filename:
+            prefix = filename.split('_')[0]
+            actual_filename = filename[len(prefix)+1:]  # +1 for the underscore
+            dir_id = self.by_top_dir.get(prefix, {}).get(actual_filename)
+        else:
+            actual_filename = filename
+            dir_id = self.by_name.get(filename)
+        return None if dir_id is None else os.path.join(self.dirs[dir_id], actual_filename)
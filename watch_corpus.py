@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import argparse
+from collections import defaultdict
+
+from csv_stream import replace_csv
+from unique_files import get_solidity_source_hash, iter_candidate_files, plan_renames
+from sloc_to_csv import count_sloc_in_buffer
+from decisions_to_csv import DECISION_KINDS, count_decision_kinds_in_buffer
+from walker import SolFileIndex, add_ignore_arguments, ignore_rules_from_args
+
+def take_snapshot(root_dir, ignore=None):
+    """
+    Stat every .sol file under root_dir.
+    Returns {path: (mtime_ns, size)} and {filename: [paths]}, both in walk order.
+    """
+    snapshot = {}
+    paths_by_name = defaultdict(list)
+
+    # The same files as unique_files reports on
+    for entry in iter_candidate_files(root_dir, ignore):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue  # Removed between listing and stat
+        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        paths_by_name[entry.name].append(entry.path)
+
+    return snapshot, paths_by_name
+
+def read_file_metrics(path, expected_stat):
+    """
+    Compute the hash, SLOC and decision kinds of a file that may be changing.
+    The file is read into memory rather than mapped, so a writer truncating
+    it cannot crash the watcher, and it is stat'ed again afterwards. Raises
+    OSError if it is gone or no longer matches expected_stat (mtime_ns, size).
+    """
+    with open(path, 'rb') as f:
+        buf = f.read()
+    stat = os.stat(path)
+    if (stat.st_mtime_ns, stat.st_size) != expected_stat or len(buf) != stat.st_size:
+        raise OSError(f"{path} changed while it was being read")
+    return get_solidity_source_hash(buf), count_sloc_in_buffer(buf), count_decision_kinds_in_buffer(buf)
+
+class CorpusWatcher:
+    """
+    Keeps the unique-file, SLOC and decision-point reports for a corpus up to
+    date, recomputing only the files that changed since the last poll.
+    """
+
+    def __init__(self, root_dir, unique_csv, sloc_csv, decisions_csv, ignore=None):
+        self.root_dir = root_dir
+        self.ignore = ignore
+        self.unique_csv = unique_csv
+        self.sloc_csv = sloc_csv
+        self.decisions_csv = decisions_csv
+
+        self.snapshot = {}
+        # Per-path metrics, filled in as files are added or modified
+        self.hashes = {}
+        self.sloc = {}
+        self.decisions = {}
+        # filename -> unique filenames of its groups of identical files
+        self.unique_by_name = {}
+        self.reported = False
+
+    def poll(self):
+        """
+        Take a new snapshot and update everything affected by the changes.
+        Returns (added, modified, removed) path lists.
+        """
+        snapshot, paths_by_name = take_snapshot(self.root_dir, self.ignore)
+
+        added = [path for path in snapshot if path not in self.snapshot]
+        modified = [path for path in snapshot
+                    if path in self.snapshot and snapshot[path] != self.snapshot[path]]
+        removed = [path for path in self.snapshot if path not in snapshot]
+        self.snapshot = snapshot
+
+        for path in removed:
+            self.forget(path)
+
+        for path in added + modified:
+            try:
+                self.hashes[path], self.sloc[path], self.decisions[path] = read_file_metrics(path, snapshot[path])
+            except OSError as e:
+                # Removed or still being written: leave it out of this round
+                # and out of the snapshot, so the next poll picks it up again
+                print(f"Skipping {path} until the next poll: {e}")
+                self.forget(path)
+                del self.snapshot[path]
+                paths_by_name[os.path.basename(path)].remove(path)
+
+        # Only hash groups for filenames that were touched can change
+        affected_names = {os.path.basename(path) for path in added + modified + removed}
+        for filename in affected_names:
+            if not paths_by_name.get(filename):
+                self.unique_by_name.pop(filename, None)
+                continue
+
+            files_by_hash = defaultdict(list)
+            for path in paths_by_name[filename]:
+                files_by_hash[self.hashes[path]].append(path)
+
+            records = plan_renames(self.root_dir, filename, files_by_hash)
+            self.unique_by_name[filename] = {record["new_filename"] for record in records}
+
+        return added, modified, removed
+
+    def forget(self, path):
+        """Drop the metrics of a path."""
+        self.hashes.pop(path, None)
+        self.sloc.pop(path, None)
+        self.decisions.pop(path, None)
+
+    def write_reports(self):
+        """Rewrite all three reports atomically from the current state."""
+        names = sorted(set().union(*self.unique_by_name.values()))
+
+        # Look each unique filename up the way sloc_to_csv and decisions_to_csv
+        # do, so the rows match theirs for the same tree. Names that are not
+        # found count as 0, as there.
+        index = SolFileIndex(self.root_dir, paths=self.snapshot)
+        no_decisions = dict.fromkeys(DECISION_KINDS, 0)
+        sloc_rows = []
+        decision_rows = []
+        for name in names:
+            path = index.resolve(name)
+            kinds = self.decisions[path] if path else no_decisions
+            sloc_rows.append([name, self.sloc[path] if path else 0])
+            decision_rows.append([name, sum(kinds.values())] + [kinds[kind] for kind in DECISION_KINDS])
+
+        replace_csv(self.unique_csv, ["Unique Filename"], ([name] for name in names))
+        replace_csv(self.sloc_csv, ['Filename', 'SLOC'], sloc_rows)
+        header = ['Filename', 'Decision Points'] + list(DECISION_KINDS.values())
+        replace_csv(self.decisions_csv, header, decision_rows)
+
+    def run(self, interval=2.0, once=False):
+        """Poll the corpus every `interval` seconds until interrupted."""
+        while True:
+            started = time.monotonic()
+            added, modified, removed = self.poll()
+
+            if added or modified or removed or not self.reported:
+                self.write_reports()
+                self.reported = True
+                elapsed = time.monotonic() - started
+                print(f"{len(added)} added, {len(modified)} modified, {len(removed)} removed - "
+                      f"reports updated in {elapsed:.2f}s")
+
+            if once:
+                return
+            time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a corpus and keep the unique file, SLOC and decision point reports up to date.")
+    parser.add_argument('directory', nargs='?', default='.', help="Directory to watch (default: .)")
+    parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls (default: 2)")
+    parser.add_argument('--unique-csv', default='duplicate_files_report.csv', help="Unique filename report (default: duplicate_files_report.csv)")
+    parser.add_argument('--sloc-csv', default='sloc_count.csv', help="SLOC report (default: sloc_count.csv)")
+    parser.add_argument('--decisions-csv', default='decision_points.csv', help="Decision point report (default: decision_points.csv)")
+    parser.add_argument('--once', action='store_true', help="Build the reports once and exit")
+    add_ignore_arguments(parser)
+    args = parser.parse_args()
+
+    directory = args.directory
+    # Extract the directory name if it's in the format "./directory_name"
+    if directory.startswith('./'):
+        directory = directory[2:]
+
+    watcher = CorpusWatcher(directory, args.unique_csv, args.sloc_csv, args.decisions_csv,
+                             ignore_rules_from_args(args))
+    print(f"Watching directory: {os.path.abspath(directory)}")
+    try:
+        watcher.run(args.interval, args.once)
+    except KeyboardInterrupt:
+        print("Stopped.")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+
+#sample command : python3 watch_corpus.py . --interval 5